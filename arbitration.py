@@ -1,25 +1,81 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required, current_user
-import pandas as pd
+from excel_snapshots import load_sheet
+import math
 import os
+from threading import Lock
 
 arbitration_bp = Blueprint('arbitration', __name__)
 
 OFFENSES_XLSX = os.path.join(os.path.dirname(__file__), 'offenses.xlsx')
 
-def load_offenses():
+# Parsed offenses.xlsx (via its binary snapshot), reloaded only when the file's mtime changes
+_offense_lock = Lock()
+_offense_catalog = {'mtime': None, 'offenses': [], 'penalties': {}}
+
+def _format_cell(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def _offense_catalog_current():
+    global _offense_catalog
     try:
-        df = pd.read_excel(OFFENSES_XLSX)
-        offenses = []
-        for _, row in df.iterrows():
-            offense = str(row.get('Offense', '')).strip()
-            penalty = str(row.get('Penalty', '')).strip()
-            if offense:
-                offenses.append({'offense': offense, 'penalty': penalty})
-        return offenses
-    except Exception as e:
+        mtime = os.stat(OFFENSES_XLSX).st_mtime_ns
+    except OSError as e:
         print(f"Error loading offenses: {e}")
+        return _offense_catalog
+    if _offense_catalog['mtime'] == mtime:
+        return _offense_catalog
+    with _offense_lock:
+        if _offense_catalog['mtime'] == mtime:
+            return _offense_catalog
+        try:
+            columns = load_sheet(OFFENSES_XLSX)
+            row_count = len(next(iter(columns.values()), []))
+            offense_names = [_format_cell(value) for value in columns.get('Offense', [''] * row_count)]
+            penalties = [_format_cell(value) for value in columns.get('Penalty', [''] * row_count)]
+            offenses = [
+                {'offense': offense, 'penalty': penalty}
+                for offense, penalty in zip(offense_names, penalties) if offense
+            ]
+        except Exception as e:
+            print(f"Error loading offenses: {e}")
+            return _offense_catalog
+        penalty_index = {}
+        for o in offenses:
+            penalty_index.setdefault(o['offense'], o['penalty'])
+        _offense_catalog = {'mtime': mtime, 'offenses': offenses, 'penalties': penalty_index}
+        return _offense_catalog
+
+def load_offenses():
+    """Return the offense list from offenses.xlsx, parsed once and cached until the file changes"""
+    return _offense_catalog_current()['offenses']
+
+def get_offense_penalty(offense):
+    """Look up the penalty for an offense in the cached catalog"""
+    return _offense_catalog_current()['penalties'].get(offense, '')
+
+def resolve_users_by_name(names):
+    """Map each full name to the users whose normalized name matches it, in one indexed query"""
+    from models import User, normalize_full_name
+    keys = {name: normalize_full_name(name) for name in names}
+    matches = {}
+    wanted = {key for key in keys.values() if len(key.split()) >= 2}
+    if wanted:
+        for user in User.query.filter(User.full_name_key.in_(wanted)).order_by(User.id):
+            matches.setdefault(user.full_name_key, []).append(user)
+    return {name: matches.get(key, []) for name, key in keys.items()}
+
+def people_involved(complaint):
+    """Split a complaint's people_involved list into (name, matching users) pairs"""
+    if not complaint.people_involved:
         return []
+    names = [name.strip() for name in complaint.people_involved.split(',')]
+    users_by_name = resolve_users_by_name(names)
+    return [(name, users_by_name[name]) for name in names]
 
 @arbitration_bp.route('/')
 @login_required
@@ -30,7 +86,7 @@ def index():
         complaints = Complaint.query.order_by(Complaint.date_filed.desc()).all()
     # Arbitrators see only unresolved complaints
     elif current_user.can_arbitrate:
-        complaints = Complaint.query.filter(Complaint.status != 'Resolved').order_by(Complaint.date_filed.desc()).all()
+        complaints = Complaint.query.filter(Complaint.status == 'Unresolved').order_by(Complaint.date_filed.desc()).all()
     else:
         complaints = []
     return render_template('arbitration.html', complaints=complaints)
@@ -49,23 +105,13 @@ def create_complaint():
         # Find accused user by first and last name
         accused_user = None
         if accused_name:
-            parts = accused_name.split()
-            if len(parts) >= 2:
-                first, last = parts[0], ' '.join(parts[1:])
-                from models import User, Complaint
-                accused_user = User.query.filter(
-                    User.first_name.ilike(first),
-                    User.last_name.ilike(last)
-                ).first()
+            matches = resolve_users_by_name([accused_name])[accused_name]
+            accused_user = matches[0] if matches else None
         if not accused_user:
             flash('No user found with that name. Please check the spelling and try again.', 'danger')
             return render_template('create_complaint.html', offenses=offenses)
         # Get penalty for selected offense
-        penalty = ''
-        for o in offenses:
-            if o['offense'] == offense:
-                penalty = o['penalty']
-                break
+        penalty = get_offense_penalty(offense)
         # Save complaint
         from models import Complaint
         complaint = Complaint(
@@ -88,10 +134,10 @@ def create_complaint():
 @arbitration_bp.route('/complaint/<int:complaint_id>', methods=['GET', 'POST'])
 @login_required
 def complaint_detail(complaint_id):
-    from models import Complaint, User
+    from models import Complaint
     from extensions import db
     complaint = Complaint.query.get_or_404(complaint_id)
-    users = User.query.all()
+    people = people_involved(complaint)
     # Allow arbitrators, admins, and moderators
     if not (current_user.can_arbitrate or current_user.is_admin or current_user.is_moderator):
         abort(403)
@@ -112,7 +158,7 @@ def complaint_detail(complaint_id):
             # Must select a character and valid deduction amount
             if not character_id:
                 flash('You must select a character to deduct status from.', 'danger')
-                return render_template('complaint_detail.html', complaint=complaint, users=users)
+                return render_template('complaint_detail.html', complaint=complaint, people=people)
             try:
                 penalty = int(complaint.penalty)
                 deduction = int(deduction_amount)
@@ -121,8 +167,9 @@ def complaint_detail(complaint_id):
                 deduction = 0
             if deduction < 1 or deduction > penalty:
                 flash(f'Deduction amount must be between 1 and {penalty}.', 'danger')
-                return render_template('complaint_detail.html', complaint=complaint, users=users)
+                return render_template('complaint_detail.html', complaint=complaint, people=people)
             from models import Character, StatusAdjustment
+            from status_ledger import record_status_totals
             character = Character.query.get(character_id)
             if character and deduction > 0:
                 character.total_status -= deduction
@@ -136,13 +183,17 @@ def complaint_detail(complaint_id):
                     adjusted_by=current_user.id
                 )
                 db.session.add(adjustment)
+                record_status_totals([(character.id, 'Penalty', None, -deduction)])
         if resolution in ['Accepted', 'Denied'] and reason:
             complaint.resolution = resolution
             complaint.resolution_reason = reason
             complaint.status = 'Resolved'
             db.session.commit()
+            if resolution == 'Accepted' and character_id:
+                from character_sheets import refresh_character_sheets
+                refresh_character_sheets([int(character_id)])
             flash('Complaint resolved.', 'success')
             return redirect(url_for('arbitration.index'))
         else:
             flash('Please provide a resolution and reason.', 'danger')
-    return render_template('complaint_detail.html', complaint=complaint, users=users) 
\ No newline at end of file
+    return render_template('complaint_detail.html', complaint=complaint, people=people) 
\ No newline at end of file
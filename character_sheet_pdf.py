@@ -0,0 +1,86 @@
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+from pdf_reports import STYLES, INFO_TABLE_STYLE, CONTAINER_TABLE_STYLE, build_pdf
+
+# Sheet geometry: 0.25 inch margins to maximize usable space
+SHEET_MARGIN = 18
+SHEET_WIDTH = letter[0] - 2 * SHEET_MARGIN
+INFO_COLUMN_WIDTH = (SHEET_WIDTH - 10) / 2  # Two info tables, leaving 10 points for spacing
+SKILL_ROWS = 37
+SKILL_COLUMNS = 5
+# Each column pair (skill name + rank) gets equal width, 85% for the name and 15% for the rank
+SKILL_COL_WIDTHS = [SHEET_WIDTH / SKILL_COLUMNS * share for _ in range(SKILL_COLUMNS) for share in (0.85, 0.15)]
+SKILLS_TABLE_COMMANDS = [
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('PADDING', (0, 0), (-1, -1), 2),
+    ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+    ('ALIGN', (3, 0), (3, -1), 'CENTER'),
+    ('ALIGN', (5, 0), (5, -1), 'CENTER'),
+    ('ALIGN', (7, 0), (7, -1), 'CENTER'),
+    ('ALIGN', (9, 0), (9, -1), 'CENTER'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('LEADING', (0, 0), (-1, -1), 10),
+]
+
+
+def render_character_sheet(sheet):
+    """Render a character sheet snapshot to PDF bytes"""
+    left_table = Table([
+        ['Name:', sheet['name']],
+        ['Realm:', sheet['realm']],
+        ['Species:', sheet['species']],
+        ['Health:', str(sheet['health'])],
+        ['Stamina:', str(sheet['stamina'])],
+        ['Resources:', str(sheet['resources'])],
+    ], colWidths=[INFO_COLUMN_WIDTH * 0.3, INFO_COLUMN_WIDTH * 0.7])
+    right_table = Table([
+        ['Status Total:', str(sheet['total_status'])],
+        ['Status Spent:', str(sheet['status_spent'])],
+        ['Status Available:', str(sheet['status_remaining'])],
+        ['Group:', sheet['group_name'] or ''],
+        ['Rank:', str(sheet['rank'])],
+        ['Character ID:', str(sheet['id'])],
+    ], colWidths=[INFO_COLUMN_WIDTH * 0.3, INFO_COLUMN_WIDTH * 0.7])
+    left_table.setStyle(INFO_TABLE_STYLE)
+    right_table.setStyle(INFO_TABLE_STYLE)
+    info_container = Table([[left_table, right_table]], colWidths=[INFO_COLUMN_WIDTH, INFO_COLUMN_WIDTH])
+    info_container.setStyle(CONTAINER_TABLE_STYLE)
+    
+    # Flatten skills into one continuous list with a header cell before each category
+    skills_by_category = {}
+    for lore_category, name, rank in sheet['skills']:
+        rank_str = str(rank) if rank is not None else "-"
+        skills_by_category.setdefault(lore_category, []).append([name, rank_str])
+    all_skills = []
+    category_positions = []
+    for category, skills in skills_by_category.items():
+        category_positions.append(len(all_skills))
+        all_skills.append([category, ""])
+        all_skills.extend(skills)
+    
+    # Flow the list down columns of SKILL_ROWS each, padding out to at least SKILL_COLUMNS columns
+    column_count = max(SKILL_COLUMNS, -(-len(all_skills) // SKILL_ROWS))
+    all_skills.extend([["", ""]] * (column_count * SKILL_ROWS - len(all_skills)))
+    table_data = []
+    for row in range(SKILL_ROWS):
+        row_data = []
+        for col in range(column_count):
+            row_data.extend(all_skills[col * SKILL_ROWS + row])
+        table_data.append(row_data)
+    
+    table_style = list(SKILLS_TABLE_COMMANDS)
+    for position in category_positions:
+        row, col = position % SKILL_ROWS, 2 * (position // SKILL_ROWS)
+        table_style.append(('BACKGROUND', (col, row), (col + 1, row), colors.lightgrey))
+    skills_table = Table(table_data, colWidths=SKILL_COL_WIDTHS)
+    skills_table.setStyle(TableStyle(table_style))
+    
+    elements = [
+        info_container,
+        Spacer(1, 2),
+        Paragraph("Skills", STYLES['SmallHeading']),
+        Spacer(1, 1),
+        skills_table
+    ]
+    return build_pdf(elements, margin=SHEET_MARGIN).getvalue()
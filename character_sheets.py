@@ -0,0 +1,239 @@
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from threading import Lock
+from flask import current_app
+from models import Character, CharacterSkill
+from skill_catalog import get_skill_catalog
+from status_costs import price_skills
+
+# Bump when the layout in character_sheet_pdf changes so previously cached PDFs are not served
+SHEET_LAYOUT_VERSION = 1
+# Default size bound for the on-disk sheet cache; override with CHARACTER_SHEET_CACHE_MAX_BYTES
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='character-sheet')
+_process_pool = None
+_process_pool_lock = Lock()
+_pending = {}
+# character id -> cache key of the snapshot its last refresh submitted; guarded by _pending_lock
+_current_keys = {}
+_pending_lock = Lock()
+
+
+def character_sheet_snapshots(character_ids):
+    """Return plain sheet data for each character id, loaded in two queries"""
+    character_ids = list(character_ids)
+    if not character_ids:
+        return {}
+    catalog = get_skill_catalog()
+    skill_ids = {}
+    for character_id, skill_id in CharacterSkill.query.with_entities(
+        CharacterSkill.character_id,
+        CharacterSkill.skill_id
+    ).filter(
+        CharacterSkill.character_id.in_(character_ids)
+    ).order_by(CharacterSkill.id):
+        skill_ids.setdefault(character_id, []).append(skill_id)
+    snapshots = {}
+    for character in Character.query.filter(Character.id.in_(character_ids)):
+        skills, _, resources = price_skills(skill_ids.get(character.id, []), catalog)
+        snapshots[character.id] = {
+            'id': character.id,
+            'name': character.name,
+            'realm': character.realm,
+            'species': character.species,
+            'group_name': character.group_name,
+            'health': character.health,
+            'stamina': character.stamina,
+            'total_status': character.total_status,
+            'status_spent': character.status_spent,
+            'status_remaining': character.status_remaining,
+            'rank': character.rank,
+            'resources': resources,
+            'skills': [(skill.lore_category, skill.name, skill.rank) for skill in skills]
+        }
+    return snapshots
+
+
+def sheet_cache_key(sheet):
+    """Cache file name for a sheet: character id plus a hash of everything printed on it"""
+    payload = json.dumps([SHEET_LAYOUT_VERSION, sheet], sort_keys=True).encode('utf-8')
+    digest = hashlib.sha256(payload).hexdigest()[:32]
+    return f"{sheet['id']}-{digest}.pdf"
+
+
+def _cache_settings():
+    cache_dir = current_app.config.get('CHARACTER_SHEET_CACHE_DIR') or os.path.join(current_app.instance_path, 'character_sheets')
+    max_bytes = current_app.config.get('CHARACTER_SHEET_CACHE_MAX_BYTES', DEFAULT_CACHE_MAX_BYTES)
+    return cache_dir, max_bytes
+
+
+def _store(cache_dir, max_bytes, key, pdf):
+    """Atomically write a rendered sheet and evict least recently used sheets over the size bound"""
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pdf)
+    path = os.path.join(cache_dir, key)
+    os.replace(tmp_path, path)
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith('.pdf'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if entry_path == path:
+            continue
+        try:
+            os.remove(entry_path)
+            total -= size
+        except FileNotFoundError:
+            pass
+    return path
+
+
+def _render_and_store(cache_dir, max_bytes, key, sheet):
+    """Render a sheet and cache it unless a later refresh superseded it; returns the PDF bytes either way"""
+    from character_sheet_pdf import render_character_sheet
+    try:
+        pdf = render_character_sheet(sheet)
+        path = _store(cache_dir, max_bytes, key, pdf)
+    finally:
+        with _pending_lock:
+            _pending.pop(key, None)
+            current = _current_keys.get(sheet['id'], key) == key
+    if not current:
+        # Finished after the character changed again; this file would never be served
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return pdf
+
+
+def _submit(cache_dir, max_bytes, key, sheet):
+    """Queue a render unless the same sheet is already being rendered"""
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _executor.submit(_render_and_store, cache_dir, max_bytes, key, sheet)
+            _pending[key] = future
+        return future
+
+
+def _remove_stale(cache_dir, character_id, keep=None):
+    if not os.path.isdir(cache_dir):
+        return
+    prefix = f'{character_id}-'
+    for entry in os.scandir(cache_dir):
+        if entry.name.startswith(prefix) and entry.name.endswith('.pdf') and entry.name != keep:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def get_character_sheet_pdf(character_id):
+    """Return an up-to-date sheet as PDF bytes, rendering it first on a cache miss"""
+    sheet = character_sheet_snapshots([character_id]).get(character_id)
+    if sheet is None:
+        return None
+    cache_dir, max_bytes = _cache_settings()
+    key = sheet_cache_key(sheet)
+    path = os.path.join(cache_dir, key)
+    try:
+        # Read it now: eviction by a background render may remove the file at any moment
+        with open(path, 'rb') as f:
+            pdf = f.read()
+        # Mark as recently used for LRU eviction
+        os.utime(path)
+        return pdf
+    except FileNotFoundError:
+        pass
+    # The sheet for this request's snapshot, even if a newer refresh has superseded its cache file
+    return _submit(cache_dir, max_bytes, key, sheet).result()
+
+
+def refresh_character_sheets(character_ids):
+    """Drop cached sheets for the given characters and re-render them in the background; call after commit"""
+    cache_dir, max_bytes = _cache_settings()
+    for character_id, sheet in character_sheet_snapshots(character_ids).items():
+        key = sheet_cache_key(sheet)
+        with _pending_lock:
+            _current_keys[character_id] = key
+        _remove_stale(cache_dir, character_id, keep=key)
+        _submit(cache_dir, max_bytes, key, sheet)
+
+
+def drop_character_sheets(character_ids):
+    """Remove every cached sheet of the given characters; call after deleting them"""
+    cache_dir, _ = _cache_settings()
+    for character_id in character_ids:
+        with _pending_lock:
+            _current_keys.pop(character_id, None)
+        _remove_stale(cache_dir, character_id)
+
+
+def _get_process_pool():
+    """Pool for bulk printing, created on the first print request.
+
+    Don't create it before the app server forks its workers. It starts its processes from a forkserver,
+    never by forking this threaded worker and its database connections; render_character_sheet only
+    needs the plain sheet dicts. Its processes import the main module, so entry points keep server
+    startup under `if __name__ == '__main__'` as app.py does."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=current_app.config.get('CHARACTER_SHEET_WORKERS'),
+                                                mp_context=multiprocessing.get_context('forkserver'))
+            atexit.register(_process_pool.shutdown, wait=False, cancel_futures=True)
+        return _process_pool
+
+
+def _render_in_order(sheets, cache_dir, pool, window):
+    """Yield PDFs in sheet order, keeping at most window renders queued on the pool"""
+    from character_sheet_pdf import render_character_sheet
+    queued = deque()
+    sheets = iter(sheets)
+
+    def queue_next():
+        sheet = next(sheets, None)
+        if sheet is None:
+            return
+        path = os.path.join(cache_dir, sheet_cache_key(sheet))
+        if os.path.exists(path):
+            queued.append((sheet, path))
+        else:
+            queued.append((sheet, pool.submit(render_character_sheet, sheet)))
+
+    for _ in range(window):
+        queue_next()
+    while queued:
+        sheet, pending = queued.popleft()
+        queue_next()
+        if isinstance(pending, str):
+            try:
+                with open(pending, 'rb') as f:
+                    yield f.read()
+                continue
+            except FileNotFoundError:
+                # Evicted since it was queued; render it after all
+                pending = pool.submit(render_character_sheet, sheet)
+        yield pending.result()
+
+
+def iter_character_sheet_pdfs(sheets):
+    """Render sheets in parallel on a process pool, reusing cached PDFs, and yield them in order"""
+    cache_dir, _ = _cache_settings()
+    pool = _get_process_pool()
+    window = current_app.config.get('CHARACTER_SHEET_PRINT_WINDOW', 2 * (os.cpu_count() or 1))
+    return _render_in_order(sheets, cache_dir, pool, window)
@@ -0,0 +1,89 @@
+import heapq
+from datetime import datetime
+from sqlalchemy import text
+from extensions import db
+from models import Event
+
+# Postgres NOTIFY channel the web app uses to tell the scheduler an event was added or changed
+EVENT_SCHEDULE_CHANNEL = 'event_schedule'
+
+# Status an event moves to at its next boundary, and which date column that boundary is
+TRANSITIONS = {
+    'Upcoming': ('In Progress', 'start_date'),
+    'In Progress': ('Completed', 'end_date'),
+}
+
+
+def announce_event_change(event_id):
+    """Ask the scheduler to re-arm an event's transitions; delivered when the current transaction commits"""
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text("SELECT pg_notify(:channel, :payload)"),
+                           {'channel': EVENT_SCHEDULE_CHANNEL, 'payload': str(event_id)})
+
+
+class EventTransitions:
+    """Min-heap of upcoming event start/end boundaries; call inside an app context"""
+
+    def __init__(self):
+        self._heap = []
+        # event id -> the one heap entry currently valid for it; anything else popped is stale
+        self._armed = {}
+
+    def _arm(self, event_id, status, start_date, end_date):
+        transition = TRANSITIONS.get(status)
+        if transition is None:
+            self._armed.pop(event_id, None)
+            return
+        new_status, column = transition
+        entry = (start_date if column == 'start_date' else end_date, event_id, status, new_status)
+        if self._armed.get(event_id) != entry:
+            self._armed[event_id] = entry
+            heapq.heappush(self._heap, entry)
+
+    def load(self):
+        """Rebuild the heap from every event that still has a transition ahead of it"""
+        self._heap = []
+        self._armed = {}
+        rows = db.session.query(Event.id, Event.status, Event.start_date, Event.end_date).filter(
+            Event.status.in_(list(TRANSITIONS))
+        ).all()
+        for row in rows:
+            self._arm(*row)
+        db.session.commit()
+
+    def rearm(self, event_id):
+        """Re-read one event and schedule its next transition, if it has one"""
+        row = db.session.query(Event.id, Event.status, Event.start_date, Event.end_date).filter(Event.id == event_id).first()
+        db.session.commit()
+        if row is None:
+            self._armed.pop(event_id, None)
+        else:
+            self._arm(*row)
+
+    def run_due(self, now=None):
+        """Apply every transition whose boundary has passed, one row at a time; returns how many were applied"""
+        now = now or datetime.now()
+        applied = 0
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            when, event_id, status, new_status = entry
+            if self._armed.get(event_id) != entry:
+                continue
+            del self._armed[event_id]
+            # Only move the row if nobody changed its status since it was armed
+            applied += Event.query.filter(Event.id == event_id, Event.status == status).update(
+                {'status': new_status}, synchronize_session=False
+            )
+            db.session.commit()
+            # An event that has already ended goes straight on to Completed in this same pass
+            self.rearm(event_id)
+        return applied
+
+    def seconds_until_next(self, now=None):
+        """Seconds until the earliest armed boundary, or None when nothing is scheduled"""
+        now = now or datetime.now()
+        while self._heap and self._armed.get(self._heap[0][1]) != self._heap[0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max((self._heap[0][0] - now).total_seconds(), 0)
@@ -1,62 +1,71 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify, Response
 from flask_login import login_required, current_user
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from sqlalchemy import func
+from sqlalchemy import func, select, union_all, literal, case, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from extensions import db
-from models import Event, EventParticipation, CastSignup, StatusAdjustment, Character, User
+from models import Event, EventParticipation, EventBooking, CastSignup, StatusAdjustment, StatusTotal, Character
+from status_ledger import record_status_totals
+from event_transitions import announce_event_change
+from character_sheets import refresh_character_sheets, character_sheet_snapshots, iter_character_sheet_pdfs
+from pdf_stream import concatenate_pdfs
 from datetime import datetime
 import pytz
 
 events_bp = Blueprint('events', __name__)
 
+def get_event_stats(event_ids):
+    """Return distinct participant and cast headcounts for each event id in one grouped query"""
+    stats = {event_id: {'participant_count': 0, 'cast_count': 0} for event_id in event_ids}
+    if not stats:
+        return stats
+    signups = union_all(
+        select(
+            EventParticipation.event_id,
+            EventParticipation.user_id,
+            literal('participant').label('kind')
+        ).where(EventParticipation.event_id.in_(stats)),
+        select(
+            CastSignup.event_id,
+            CastSignup.user_id,
+            literal('cast').label('kind')
+        ).where(CastSignup.event_id.in_(stats))
+    ).subquery()
+    rows = db.session.query(
+        signups.c.event_id,
+        func.count(func.distinct(case((signups.c.kind == 'participant', signups.c.user_id)))),
+        func.count(func.distinct(case((signups.c.kind == 'cast', signups.c.user_id))))
+    ).group_by(signups.c.event_id).all()
+    for event_id, participant_count, cast_count in rows:
+        stats[event_id] = {
+            'participant_count': participant_count,
+            'cast_count': cast_count
+        }
+    return stats
+
 @events_bp.route('/events')
 @login_required
 def events():
-    # Update event statuses immediately
-    now = datetime.now()
-    Event.query.filter(
-        Event.status == 'Upcoming',
-        Event.start_date <= now
-    ).update({'status': 'In Progress'})
-    Event.query.filter(
-        Event.status == 'In Progress',
-        Event.end_date <= now
-    ).update({'status': 'Completed'})
-    db.session.commit()
-    upcoming_events = Event.query.filter_by(status='Upcoming').all()
-    in_progress_events = Event.query.filter_by(status='In Progress').all()
-    completed_events = Event.query.filter_by(status='Completed').all()
-    # Filter to only events the user signed up for
+    # Event statuses are moved on by scheduler.py as each event starts and ends
+    listed_events = Event.query.filter(
+        Event.status.in_(['Upcoming', 'In Progress', 'Completed'])
+    ).all()
+    # Filter completed events to only those the user signed up for
     user_event_ids = set(
-        [ep.event_id for ep in EventParticipation.query.filter_by(user_id=current_user.id).all()] +
-        [cs.event_id for cs in CastSignup.query.filter_by(user_id=current_user.id).all()]
+        [event_id for event_id, in db.session.query(EventParticipation.event_id).filter_by(user_id=current_user.id).distinct()] +
+        [event_id for event_id, in db.session.query(CastSignup.event_id).filter_by(user_id=current_user.id).distinct()]
     )
-    completed_events = [event for event in completed_events if event.id in user_event_ids]
-    def get_event_counts(event):
-        participant_count = db.session.query(EventParticipation.user_id)\
-            .filter_by(event_id=event.id)\
-            .distinct()\
-            .count()
-        cast_count = db.session.query(CastSignup.user_id)\
-            .filter_by(event_id=event.id)\
-            .distinct()\
-            .count()
-        return {
-            'participant_count': participant_count,
-            'cast_count': cast_count
-        }
-    upcoming_events = [(event, get_event_counts(event)) for event in upcoming_events]
-    in_progress_events = [(event, get_event_counts(event)) for event in in_progress_events]
-    completed_events = [(event, get_event_counts(event)) for event in completed_events]
+    listed_events = [
+        event for event in listed_events
+        if event.status != 'Completed' or event.id in user_event_ids
+    ]
+    event_stats = get_event_stats([event.id for event in listed_events])
+    def with_counts(status):
+        return [(event, event_stats[event.id]) for event in listed_events if event.status == status]
     return render_template('events.html',
-                         upcoming_events=upcoming_events,
-                         in_progress_events=in_progress_events,
-                         completed_events=completed_events)
+                         upcoming_events=with_counts('Upcoming'),
+                         in_progress_events=with_counts('In Progress'),
+                         completed_events=with_counts('Completed'))
 
 @events_bp.route('/create_event', methods=['GET', 'POST'])
 @login_required
@@ -80,6 +89,8 @@ def create_event():
             created_by=current_user.id
         )
         db.session.add(event)
+        db.session.flush()
+        announce_event_change(event.id)
         db.session.commit()
         flash('Event created successfully!')
         return redirect(url_for('events.events'))
@@ -94,56 +105,43 @@ def signup_event(event_id):
         return redirect(url_for('events.events'))
     if request.method == 'POST':
         signup_type = request.form.get('signup_type')
+        # Requested timeblock -> character, for whichever signup kind was submitted
+        requested = {}
         if signup_type == 'participant':
+            model = EventParticipation
             for timeblock in range(1, event.timeblocks + 1):
                 character_id = request.form.get(f'character_{timeblock}')
                 if character_id:
-                    existing_participant = EventParticipation.query.filter_by(
-                        event_id=event_id,
-                        user_id=current_user.id,
-                        timeblock=timeblock
-                    ).first()
-                    existing_cast = CastSignup.query.filter_by(
-                        event_id=event_id,
-                        user_id=current_user.id,
-                        timeblock=timeblock
-                    ).first()
-                    if existing_participant or existing_cast:
-                        flash(f'You are already signed up for timeblock {timeblock}')
-                        continue
-                    participation = EventParticipation(
-                        event_id=event_id,
-                        user_id=current_user.id,
-                        character_id=character_id,
-                        timeblock=timeblock
-                    )
-                    db.session.add(participation)
+                    requested[timeblock] = int(character_id)
         elif signup_type == 'cast':
+            model = CastSignup
             character_id = request.form.get('cast_character')
-            selected_timeblocks = request.form.getlist('cast_timeblocks')
-            for timeblock in selected_timeblocks:
-                timeblock = int(timeblock)
-                existing_participant = EventParticipation.query.filter_by(
-                    event_id=event_id,
-                    user_id=current_user.id,
-                    timeblock=timeblock
-                ).first()
-                existing_cast = CastSignup.query.filter_by(
-                    event_id=event_id,
-                    user_id=current_user.id,
-                    timeblock=timeblock
-                ).first()
-                if existing_participant or existing_cast:
-                    flash(f'You are already signed up for timeblock {timeblock}')
-                else:
-                    cast_signup = CastSignup(
-                        event_id=event_id,
-                        user_id=current_user.id,
-                        character_id=character_id,
-                        timeblock=timeblock
-                    )
-                    db.session.add(cast_signup)
-        db.session.commit()
+            if character_id:
+                for timeblock in request.form.getlist('cast_timeblocks'):
+                    requested[int(timeblock)] = int(character_id)
+        # Timeblocks the user already holds at this event, as participant or cast
+        booked = {
+            timeblock for timeblock, in db.session.query(EventBooking.timeblock).filter_by(
+                event_id=event_id,
+                user_id=current_user.id
+            )
+        }
+        for timeblock in sorted(requested.keys() & booked):
+            flash(f'You are already signed up for timeblock {timeblock}')
+        rows = [
+            {'event_id': event_id, 'user_id': current_user.id, 'character_id': character_id, 'timeblock': timeblock}
+            for timeblock, character_id in sorted(requested.items()) if timeblock not in booked
+        ]
+        if rows:
+            try:
+                # The unique booking key rejects anything a concurrent submission booked after the read above
+                db.session.execute(insert(EventBooking), rows)
+                db.session.execute(insert(model), rows)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                flash('You are already signed up for one or more of those timeblocks')
+                return redirect(url_for('events.signup_event', event_id=event_id))
         flash('Successfully signed up for the event!')
         return redirect(url_for('events.events'))
     realm_characters = Character.query.filter_by(
@@ -220,77 +218,76 @@ def event_roster_pdf(event_id):
         {'user': v['user'], 'character': v['character'], 'timeblocks': sorted(v['timeblocks']), 'statuses': v['statuses']}
         for v in cast_groups.values()
     ]
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36)
-    styles = getSampleStyleSheet()
-    elements = []
-    elements.append(Paragraph(f"Event Roster: {event.title}", styles['Title']))
-    elements.append(Paragraph(f"Realm: {event.realm}", styles['Normal']))
-    elements.append(Paragraph(f"Location: {event.location}", styles['Normal']))
-    elements.append(Paragraph(f"Start: {event.start_date.strftime('%Y-%m-%d %I:%M %p')}", styles['Normal']))
-    elements.append(Paragraph(f"End: {event.end_date.strftime('%Y-%m-%d %I:%M %p')}", styles['Normal']))
-    total_participants = len(participant_groups)
-    total_cast = len(cast_groups)
-    elements.append(Paragraph(f"Total Participants: {total_participants}", styles['Heading3']))
-    elements.append(Paragraph(f"Total Cast: {total_cast}", styles['Heading3']))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("Participants", styles['Heading2']))
-    if participant_groups:
-        data = [["User", "Character", "Timeblocks"]]
-        for group in participant_groups:
-            data.append([
-                f"{group['user'].first_name} {group['user'].last_name}",
-                f"{group['character'].name} ({group['character'].realm})",
-                ', '.join(str(tb) for tb in group['timeblocks'])
-            ])
-        table = Table(data, hAlign='LEFT')
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ]))
-        elements.append(table)
-    else:
-        elements.append(Paragraph("No participants.", styles['Normal']))
-    elements.append(Spacer(1, 16))
-    elements.append(Paragraph("Cast", styles['Heading2']))
-    if cast_groups:
-        data = [["User", "Character", "Timeblocks", "Status"]]
-        for group in cast_groups:
-            data.append([
-                f"{group['user'].first_name} {group['user'].last_name}",
-                f"{group['character'].name} ({group['character'].realm})",
-                ', '.join(str(tb) for tb in group['timeblocks']),
-                ', '.join(group['statuses'])
-            ])
-        table = Table(data, hAlign='LEFT')
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ]))
-        elements.append(table)
-    else:
-        elements.append(Paragraph("No cast signups.", styles['Normal']))
-    doc.build(elements)
-    buffer.seek(0)
+    from pdf_reports import tabular_report
+    buffer = tabular_report(
+        f"Event Roster: {event.title}",
+        lines=[
+            (f"Realm: {event.realm}", 'Normal'),
+            (f"Location: {event.location}", 'Normal'),
+            (f"Start: {event.start_date.strftime('%Y-%m-%d %I:%M %p')}", 'Normal'),
+            (f"End: {event.end_date.strftime('%Y-%m-%d %I:%M %p')}", 'Normal'),
+            (f"Total Participants: {len(participant_groups)}", 'Heading3'),
+            (f"Total Cast: {len(cast_groups)}", 'Heading3')
+        ],
+        sections=[
+            ("Participants", ["User", "Character", "Timeblocks"], [
+                [
+                    f"{group['user'].first_name} {group['user'].last_name}",
+                    f"{group['character'].name} ({group['character'].realm})",
+                    ', '.join(str(tb) for tb in group['timeblocks'])
+                ]
+                for group in participant_groups
+            ], "No participants."),
+            ("Cast", ["User", "Character", "Timeblocks", "Status"], [
+                [
+                    f"{group['user'].first_name} {group['user'].last_name}",
+                    f"{group['character'].name} ({group['character'].realm})",
+                    ', '.join(str(tb) for tb in group['timeblocks']),
+                    ', '.join(group['statuses'])
+                ]
+                for group in cast_groups
+            ], "No cast signups.")
+        ]
+    )
     return send_file(buffer, as_attachment=True, download_name=f"{event.title}_roster.pdf", mimetype='application/pdf')
 
+def character_processed_for_event(event_id, character_id):
+    """EXISTS clause that is true once a character has status adjustments recorded for an event"""
+    return db.session.query(StatusAdjustment.id).filter(
+        StatusAdjustment.event_id == event_id,
+        StatusAdjustment.character_id == character_id
+    ).exists()
+
+@events_bp.route('/event/<int:event_id>/character_sheets_pdf')
+@login_required
+def event_character_sheets_pdf(event_id):
+    if not current_user.can_create_events:
+        flash('You do not have permission to view this page')
+        return redirect(url_for('events.events'))
+    event = Event.query.get_or_404(event_id)
+    character_ids = [
+        character_id for character_id, in db.session.query(EventParticipation.character_id).filter_by(event_id=event_id).union(
+            db.session.query(CastSignup.character_id).filter_by(event_id=event_id)
+        ).order_by(EventParticipation.character_id)
+    ]
+    sheets = character_sheet_snapshots(character_ids)
+    if not sheets:
+        flash('No characters are signed up for this event')
+        return redirect(url_for('events.event_roster', event_id=event_id))
+    # Sheets are rendered in parallel and streamed to the client as each one finishes
+    pdfs = iter_character_sheet_pdfs([sheets[character_id] for character_id in character_ids if character_id in sheets])
+    response = Response(concatenate_pdfs(pdfs), mimetype='application/pdf')
+    response.headers.set('Content-Disposition', 'attachment', filename=f"{event.title}_character_sheets.pdf")
+    return response
+
 @events_bp.route('/status_management')
 @login_required
 def status_management():
     unprocessed_events = db.session.query(Event).filter(
         Event.status == 'Completed',
         db.session.query(EventParticipation).filter(
-            EventParticipation.event_id == Event.id
-        ).outerjoin(
-            StatusAdjustment,
-            (StatusAdjustment.character_id == EventParticipation.character_id) &
-            (StatusAdjustment.notes.like('Event: ' + Event.title + '%'))
-        ).filter(
-            StatusAdjustment.id == None
+            EventParticipation.event_id == Event.id,
+            ~character_processed_for_event(EventParticipation.event_id, EventParticipation.character_id)
         ).exists()
     ).order_by(Event.start_date.desc()).all()
     cast_events = db.session.query(Event).join(
@@ -316,13 +313,9 @@ def get_event_participants(event_id):
     ).join(
         EventParticipation,
         Character.id == EventParticipation.character_id
-    ).outerjoin(
-        StatusAdjustment,
-        (StatusAdjustment.character_id == Character.id) & 
-        (StatusAdjustment.notes.like(f'Event: {event.title}%'))
     ).filter(
         EventParticipation.event_id == event_id,
-        StatusAdjustment.id == None
+        ~character_processed_for_event(event.id, Character.id)
     ).group_by(Character.id).order_by(Character.id).all()
     return render_template('event_participants.html',
                          event=event,
@@ -375,12 +368,20 @@ def adjust_event_status():
                 event_id=event.id
             )
             db.session.add(adjustment)
+    record_status_totals(
+        (character.id, status_type, event.id, amount)
+        for status_type, amount in status_types.items() if amount > 0
+    )
     character.total_status += total_status
     character.status_remaining += total_status
     character.update_rank()
+    db.session.flush()
     remaining_participants = (
         db.session.query(EventParticipation.character_id)
-        .filter_by(event_id=event_id)
+        .filter(
+            EventParticipation.event_id == event.id,
+            ~character_processed_for_event(event.id, EventParticipation.character_id)
+        )
         .distinct()
         .count()
     )
@@ -388,12 +389,94 @@ def adjust_event_status():
         event_id=event_id,
         status='Pending'
     ).count()
-    if remaining_participants == 1 and pending_cast_signups == 0:
+    if remaining_participants == 0 and pending_cast_signups == 0:
         event.processed = True
     db.session.commit()
+    refresh_character_sheets([character.id])
     flash(f'Successfully added {total_status} status points to {character.name}')
     return redirect(url_for('events.get_event_participants', event_id=event_id))
 
+AWARD_STATUS_FIELDS = {
+    'Writing': 'writing_status',
+    'Management': 'management_status',
+    'Service': 'service_status',
+    'Cast': 'cast_status',
+    'Interaction': 'interaction_status'
+}
+
+@events_bp.route('/event/<int:event_id>/award_status', methods=['GET', 'POST'])
+@login_required
+def award_event_status(event_id):
+    if not current_user.can_add_event_status:
+        flash('You do not have permission to add event status')
+        return redirect(url_for('events.status_management'))
+    event = Event.query.get_or_404(event_id)
+    if event.processed:
+        flash('This event has already been processed')
+        return redirect(url_for('events.status_management'))
+    # Timeblock counts for every character still waiting on status, in one grouped query
+    timeblock_counts = dict(
+        db.session.query(
+            EventParticipation.character_id,
+            func.count(EventParticipation.timeblock)
+        ).filter(
+            EventParticipation.event_id == event.id,
+            ~character_processed_for_event(event.id, EventParticipation.character_id)
+        ).group_by(EventParticipation.character_id).all()
+    )
+    if request.method == 'GET':
+        characters = Character.query.filter(
+            Character.id.in_(timeblock_counts)
+        ).order_by(Character.id).all()
+        participants = [(character, timeblock_counts[character.id]) for character in characters]
+        return render_template('award_event_status.html',
+                             event=event,
+                             participants=participants,
+                             status_fields=AWARD_STATUS_FIELDS)
+    adjustments = []
+    totals = {}
+    for character_id, timeblock_count in timeblock_counts.items():
+        status_types = {}
+        for status_type, field in AWARD_STATUS_FIELDS.items():
+            try:
+                status_types[status_type] = int(request.form.get(f'{field}_{character_id}', 0) or 0)
+            except ValueError:
+                status_types[status_type] = 0
+        status_types['Play'] = timeblock_count * 25
+        for status_type, amount in status_types.items():
+            if amount > 0:
+                adjustments.append({
+                    'character_id': character_id,
+                    'amount': amount,
+                    'status_type': status_type,
+                    'notes': f'Event: {event.title}',
+                    'adjusted_by': current_user.id,
+                    'event_id': event.id
+                })
+                totals[character_id] = totals.get(character_id, 0) + amount
+    if adjustments:
+        db.session.execute(insert(StatusAdjustment), adjustments)
+        record_status_totals(
+            (adj['character_id'], adj['status_type'], adj['event_id'], adj['amount'])
+            for adj in adjustments
+        )
+        # Awards only change total and remaining status, so rank (based on status spent) is unaffected
+        awarded = case(totals, value=Character.id, else_=0)
+        Character.query.filter(Character.id.in_(totals)).update({
+            Character.total_status: Character.total_status + awarded,
+            Character.status_remaining: Character.status_remaining + awarded
+        }, synchronize_session=False)
+    pending_cast_signups = CastSignup.query.filter_by(
+        event_id=event.id,
+        status='Pending'
+    ).count()
+    if pending_cast_signups == 0:
+        event.processed = True
+    db.session.commit()
+    refresh_character_sheets(totals)
+    flash(f'Successfully added {sum(totals.values())} status points to {len(totals)} characters')
+    return redirect(url_for('events.status_management'))
+
 @events_bp.route('/event/<int:event_id>/my_signups')
 @login_required
 def my_event_signups(event_id):
@@ -451,12 +534,15 @@ def event_history_detail(event_id):
         flash('You do not have permission to access this page')
         return redirect(url_for('events.events'))
     event = Event.query.get_or_404(event_id)
-    adjustments = StatusAdjustment.query.filter_by(event_id=event_id).all()
+    adjustments = StatusAdjustment.query.options(
+        joinedload(StatusAdjustment.user),
+        joinedload(StatusAdjustment.character)
+    ).filter_by(event_id=event_id).all()
     # Group adjustments by user
     user_summaries = {}
     for adj in adjustments:
-        user = User.query.get(adj.adjusted_by)
-        character = Character.query.get(adj.character_id)
+        user = adj.user
+        character = adj.character
         if user.id not in user_summaries:
             user_summaries[user.id] = {
                 'user': user,
@@ -471,11 +557,9 @@ def event_history_detail(event_id):
     # For backward compatibility, keep the old details list
     details = []
     for adj in adjustments:
-        character = Character.query.get(adj.character_id)
-        user = User.query.get(adj.adjusted_by)
         details.append({
-            'character': character,
-            'user': user,
+            'character': adj.character,
+            'user': adj.user,
             'amount': adj.amount,
             'status_type': adj.status_type,
             'notes': adj.notes,
@@ -487,15 +571,21 @@ def event_history_detail(event_id):
 @login_required
 def attended_events():
     # Collect participations and cast signups for the current user
-    participations = EventParticipation.query.filter_by(user_id=current_user.id).all()
-    cast_signups = CastSignup.query.filter_by(user_id=current_user.id).all()
+    participations = EventParticipation.query.options(
+        joinedload(EventParticipation.event),
+        joinedload(EventParticipation.character)
+    ).filter_by(user_id=current_user.id).all()
+    cast_signups = CastSignup.query.options(
+        joinedload(CastSignup.event),
+        joinedload(CastSignup.character)
+    ).filter_by(user_id=current_user.id).all()
     attended = {}
     # Group participations
     for p in participations:
         key = (p.event_id, p.character_id, 'Participant')
         if key not in attended:
-            attended[key] = {'event': Event.query.get(p.event_id),
-                             'character': Character.query.get(p.character_id),
+            attended[key] = {'event': p.event,
+                             'character': p.character,
                              'role': 'Participant',
                              'timeblocks': set(),
                              'status_gained': 0}
@@ -504,16 +594,29 @@ def attended_events():
     for c in cast_signups:
         key = (c.event_id, c.character_id, 'Cast')
         if key not in attended:
-            attended[key] = {'event': Event.query.get(c.event_id),
-                             'character': Character.query.get(c.character_id),
+            attended[key] = {'event': c.event,
+                             'character': c.character,
                              'role': 'Cast',
                              'timeblocks': set(),
                              'status_gained': 0}
         attended[key]['timeblocks'].add(c.timeblock)
-    # Calculate status gained for each (event, character, role)
+    # Calculate status gained for each (event, character, role) from the summary table
+    status_gained = {}
+    if attended:
+        status_gained = {
+            (event_id, character_id): amount
+            for event_id, character_id, amount in db.session.query(
+                StatusTotal.event_id,
+                StatusTotal.character_id,
+                func.sum(StatusTotal.amount)
+            ).filter(
+                StatusTotal.event_id.in_({key[0] for key in attended}),
+                StatusTotal.character_id.in_({key[1] for key in attended})
+            ).group_by(StatusTotal.event_id, StatusTotal.character_id)
+        }
     for key, entry in attended.items():
         event_id, character_id, _ = key
-        entry['status_gained'] = db.session.query(func.sum(StatusAdjustment.amount)).filter_by(event_id=event_id, character_id=character_id).scalar() or 0
+        entry['status_gained'] = status_gained.get((event_id, character_id)) or 0
         entry['timeblocks'] = sorted(entry['timeblocks'])
     # Convert to list and sort by event date descending
     attended_list = list(attended.values())
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Bump when the snapshot layout changes so old snapshots are rebuilt
+SNAPSHOT_FORMAT = 1
+
+
+def snapshot_path(source):
+    return f'{source}.snapshot'
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, 'rb') as f:
+            # Snapshots are only ever written by compile_sheet below
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT:
+        return None
+    return snapshot
+
+
+def _write_snapshot(path, snapshot):
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Note: could not write snapshot {path}: {e}")
+
+
+def compile_sheet(source):
+    """Parse the first sheet of an Excel workbook and store its columns as a binary snapshot"""
+    import pandas as pd
+    df = pd.read_excel(source)
+    stat = os.stat(source)
+    snapshot = {
+        'format': SNAPSHOT_FORMAT,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_size': stat.st_size,
+        'source_sha256': _file_sha256(source),
+        'columns': {str(name): df[name].tolist() for name in df.columns}
+    }
+    _write_snapshot(snapshot_path(source), snapshot)
+    return snapshot
+
+
+def load_sheet(source):
+    """Return {column name: list of values} for a workbook, from its snapshot unless the source changed"""
+    stat = os.stat(source)
+    snapshot = _read_snapshot(snapshot_path(source))
+    if snapshot is not None:
+        if snapshot['source_mtime_ns'] == stat.st_mtime_ns and snapshot['source_size'] == stat.st_size:
+            return snapshot['columns']
+        # Touched but not edited (e.g. a fresh checkout): keep the snapshot, just record the new mtime
+        if snapshot['source_size'] == stat.st_size and snapshot['source_sha256'] == _file_sha256(source):
+            snapshot['source_mtime_ns'] = stat.st_mtime_ns
+            _write_snapshot(snapshot_path(source), snapshot)
+            return snapshot['columns']
+    return compile_sheet(source)['columns']
+
+
+if __name__ == '__main__':
+    import sys
+    sources = sys.argv[1:] or ['skills.xlsx', 'offenses.xlsx']
+    for source in sources:
+        columns = compile_sheet(source)['columns']
+        rows = len(next(iter(columns.values()), []))
+        print(f"Compiled {source} -> {snapshot_path(source)} ({len(columns)} columns, {rows} rows)")
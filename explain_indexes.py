@@ -0,0 +1,63 @@
+"""Index check: EXPLAIN each hot query against the app's database and fail if one is not served by its index.
+
+Run `python explain_indexes.py` after `flask --app app db upgrade`. On Postgres sequential scans are
+disabled for the check, so the answer doesn't depend on how much data the tables hold yet.
+"""
+import sys
+from sqlalchemy import select, text
+from extensions import db
+from models import EventParticipation, CastSignup, StatusAdjustment, Character, CharacterSkill, Complaint
+
+# (description, index that must appear in the plan, query)
+HOT_QUERIES = [
+    ("a user's participation in an event timeblock", 'ix_event_participation_event_user_timeblock',
+     select(EventParticipation.id).where(EventParticipation.event_id == 1, EventParticipation.user_id == 1,
+                                         EventParticipation.timeblock == 1)),
+    ('pending cast signups for an event', 'ix_cast_signup_event_status',
+     select(CastSignup.id).where(CastSignup.event_id == 1, CastSignup.status == 'Pending')),
+    ('status history for a character', 'ix_status_adjustment_character_id',
+     select(StatusAdjustment.id).where(StatusAdjustment.character_id == 1)),
+    ('status adjustments for an event', 'ix_status_adjustment_event_character',
+     select(StatusAdjustment.id).where(StatusAdjustment.event_id == 1)),
+    ("a user's characters", 'ix_character_user_id',
+     select(Character.id).where(Character.user_id == 1).order_by(Character.id)),
+    ("a character's skills", 'ix_character_skill_character_id',
+     select(CharacterSkill.skill_id).where(CharacterSkill.character_id == 1)),
+    ('unresolved complaints, newest first', 'ix_complaint_status_date_filed',
+     select(Complaint.id).where(Complaint.status == 'Unresolved').order_by(Complaint.date_filed.desc())),
+]
+
+
+def explain(conn, statement):
+    """Return the query plan for statement as text"""
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = conn.execute(text(f"EXPLAIN {sql}")).all()
+    elif conn.dialect.name == 'sqlite':
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    else:
+        raise RuntimeError(f"Don't know how to EXPLAIN on {conn.dialect.name}")
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def check_indexes():
+    """EXPLAIN every hot query; returns a list of (description, index, plan) for those missing their index"""
+    failures = []
+    with db.engine.connect() as conn:
+        for description, index, statement in HOT_QUERIES:
+            plan = explain(conn, statement)
+            conn.rollback()
+            if index not in plan:
+                failures.append((description, index, plan))
+            print(f"{'ok  ' if index in plan else 'FAIL'} {description}: {index}")
+    return failures
+
+
+if __name__ == '__main__':
+    from app import create_app
+    with create_app().app_context():
+        failures = check_indexes()
+    for description, index, plan in failures:
+        print(f"\n{description} does not use {index}:\n{plan}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,64 @@
+"""Cold-start benchmark: import the app in a fresh interpreter under -X importtime and fail on regressions.
+
+Run `python import_benchmark.py` from the project root. It exits non-zero when importing the app loads
+one of the heavy libraries that are meant to load on first use, or when the best of several cold imports
+exceeds the time budget.
+"""
+import argparse
+import subprocess
+import sys
+
+# Only the PDF and Excel code paths need these; importing them at module level costs every worker
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'reportlab')
+DEFAULT_BUDGET_MS = 1500
+DEFAULT_RUNS = 3
+
+
+def measure_import(modules):
+    """Import modules in a new interpreter and return {module name: (self us, cumulative us, depth)}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Top-level imports are indented by one space, each nesting level by two more
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=['app'], help='modules to import (default: app)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='fail above this cold import time')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='cold imports to run; the fastest counts')
+    args = parser.parse_args()
+
+    runs = [measure_import(args.modules) for _ in range(max(args.runs, 1))]
+    best = min(runs, key=lambda timings: sum(c for _, c, depth in timings.values() if depth == 0))
+    total_ms = sum(c for _, c, depth in best.values() if depth == 0) / 1000
+
+    print(f"Cold import of {', '.join(args.modules)}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms), {len(best)} modules")
+    print("Slowest modules (self time):")
+    for name, (self_us, cumulative_us, _) in sorted(best.items(), key=lambda item: -item[1][0])[:10]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    heavy = sorted(name for name in best if name.split('.')[0] in HEAVY_MODULES and '.' not in name)
+    if heavy:
+        failures.append(f"heavy libraries imported at startup: {', '.join(heavy)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"cold import took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,7 @@ from flask_login import login_required, login_user, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from models import User
 from extensions import db
+from principal import forget_principal
 from datetime import datetime
 
 main_routes_bp = Blueprint('main_routes', __name__)
@@ -72,7 +73,7 @@ def logout():
 @main_routes_bp.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
-    user = current_user
+    user = db.session.get(User, current_user.id)
     if request.method == 'POST':
         user.first_name = request.form.get('first_name', user.first_name)
         user.last_name = request.form.get('last_name', user.last_name)
@@ -82,6 +83,7 @@ def profile():
         if birthday_str:
             user.birthday = datetime.strptime(birthday_str, '%Y-%m-%d').date()
         db.session.commit()
+        forget_principal(user.id)
         flash('Profile updated successfully!')
         return redirect(url_for('main_routes.profile'))
     return render_template('profile.html', user=user) 
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""character cascade
+
+Every table keyed by character_id deletes its rows along with the character (ON DELETE CASCADE),
+so removing a character, or all of a lapsed account's characters, is a single DELETE.
+
+Revision ID: 0004_character_cascade
+Revises: 0003_event_bookings
+Create Date: 2026-10-18 10:12:08.316402
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_character_cascade'
+down_revision = '0003_event_bookings'
+branch_labels = None
+depends_on = None
+
+CHARACTER_TABLES = (
+    'character_skill', 'status_adjustment', 'status_total', 'status_purchase',
+    'event_participation', 'cast_signup', 'event_booking',
+)
+# Postgres' own name for an unnamed foreign key; SQLite's unnamed keys are matched by it during the table copy
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def _replace_character_fk(ondelete):
+    for table in CHARACTER_TABLES:
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(f'{table}_character_id_fkey', type_='foreignkey')
+            batch_op.create_foreign_key(f'{table}_character_id_fkey', 'character', ['character_id'], ['id'],
+                                        ondelete=ondelete)
+
+
+def upgrade():
+    _replace_character_fk('CASCADE')
+
+
+def downgrade():
+    _replace_character_fk(None)
@@ -1,27 +1,11 @@
 from flask_login import UserMixin
 from datetime import datetime, UTC
 from extensions import db
+from status_costs import rank_for, STARTING_STATUS
 
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    first_name = db.Column(db.String(80), nullable=False)
-    last_name = db.Column(db.String(80), nullable=False)
-    phone = db.Column(db.String(30), nullable=True)
-    address = db.Column(db.String(200), nullable=True)
-    birthday = db.Column(db.Date, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.Text)
-    is_admin = db.Column(db.Boolean, default=False)
-    is_moderator = db.Column(db.Boolean, default=False)
-    can_create_events = db.Column(db.Boolean, default=False)
-    can_add_event_status = db.Column(db.Boolean, default=False)
-    can_adjust_character_status = db.Column(db.Boolean, default=False)
-    can_accept_cast = db.Column(db.Boolean, default=False)
-    can_arbitrate = db.Column(db.Boolean, default=False)
-    membership_level = db.Column(db.String(20), default='None')  # None, Basic, Standard, Premium
-    membership_expiry = db.Column(db.DateTime, nullable=True)
-    date_registered = db.Column(db.DateTime, default=datetime.now(UTC))
-    characters = db.relationship('Character', backref='user', lazy=True)
+class MembershipMixin:
+    """Membership rules shared by User rows and the cached session principal"""
+    __slots__ = ()
     
     def get_character_limit(self):
         """Get the character limit based on membership level"""
@@ -38,28 +22,26 @@ class User(UserMixin, db.Model):
         """Check if user can edit characters based on membership"""
         return self.membership_level != 'None'
     
-    def get_editable_characters(self):
-        """Get characters that can be edited based on membership limits"""
-        if self.membership_level == 'None':
-            return []  # No characters can be edited
-        
-        # Check if membership is expired
-        if self.membership_expiry:
-            # Ensure both datetimes are timezone-aware for comparison
-            now = datetime.now(UTC)
-            expiry = self.membership_expiry
-            if expiry.tzinfo is None:
-                # If expiry is timezone-naive, assume it's UTC
-                expiry = expiry.replace(tzinfo=UTC)
-            if expiry < now:
-                return []  # No characters can be edited if membership is expired
-        
-        character_limit = self.get_character_limit()
-        # Get characters ordered by creation date (oldest first)
-        all_characters = Character.query.filter_by(user_id=self.id).order_by(Character.id.asc()).all()
-        
-        # For non-None memberships, return only the oldest characters up to the limit
-        return all_characters[:character_limit]
+    def can_edit_character(self, character_id):
+        """Check if one of this user's characters is among the oldest ones their membership lets them edit"""
+        if self.is_membership_expired():
+            return False
+        # Its rank by age is the number of older characters, answered from the user_id index
+        older = db.session.query(db.func.count(Character.id)).filter(
+            Character.user_id == self.id,
+            Character.id < character_id
+        ).scalar()
+        return older < self.get_character_limit()
+    
+    def editable_character_ids(self):
+        """Ids of the characters this user can edit: the oldest ones, up to the membership limit"""
+        if self.is_membership_expired():
+            return set()
+        return {
+            character_id for character_id, in db.session.query(Character.id).filter(
+                Character.user_id == self.id
+            ).order_by(Character.id).limit(self.get_character_limit())
+        }
     
     def is_membership_expired(self):
         """Check if membership is expired"""
@@ -75,6 +57,38 @@ class User(UserMixin, db.Model):
             return expiry < now
         return False
 
+class User(MembershipMixin, UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    first_name = db.Column(db.String(80), nullable=False)
+    last_name = db.Column(db.String(80), nullable=False)
+    phone = db.Column(db.String(30), nullable=True)
+    address = db.Column(db.String(200), nullable=True)
+    birthday = db.Column(db.Date, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.Text)
+    is_admin = db.Column(db.Boolean, default=False)
+    is_moderator = db.Column(db.Boolean, default=False)
+    can_create_events = db.Column(db.Boolean, default=False)
+    can_add_event_status = db.Column(db.Boolean, default=False)
+    can_adjust_character_status = db.Column(db.Boolean, default=False)
+    can_accept_cast = db.Column(db.Boolean, default=False)
+    can_arbitrate = db.Column(db.Boolean, default=False)
+    membership_level = db.Column(db.String(20), default='None')  # None, Basic, Standard, Premium
+    membership_expiry = db.Column(db.DateTime, nullable=True)
+    date_registered = db.Column(db.DateTime, default=datetime.now(UTC))
+    # Lowercased "first last", kept in sync on save for indexed name lookups
+    full_name_key = db.Column(db.String(161), nullable=True, index=True)
+    characters = db.relationship('Character', backref='user', lazy=True)
+
+def normalize_full_name(name):
+    """Normalize a full name for lookups: lowercase with single spaces"""
+    return ' '.join((name or '').lower().split())
+
+@db.event.listens_for(User, 'before_insert')
+@db.event.listens_for(User, 'before_update')
+def update_full_name_key(mapper, connection, user):
+    user.full_name_key = normalize_full_name(f'{user.first_name} {user.last_name}')
+
 class Character(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), nullable=False)
@@ -83,12 +97,13 @@ class Character(db.Model):
     group_name = db.Column(db.String(100), nullable=True)
     health = db.Column(db.Integer, default=0)
     stamina = db.Column(db.Integer, default=0)
-    total_status = db.Column(db.Integer, default=5000)
+    total_status = db.Column(db.Integer, default=STARTING_STATUS)
     status_spent = db.Column(db.Integer, default=0)
-    status_remaining = db.Column(db.Integer, default=5000)
+    status_remaining = db.Column(db.Integer, default=STARTING_STATUS)
     rank = db.Column(db.Integer, default=1)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    skills = db.relationship('CharacterSkill', backref='character', lazy=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    # Child rows go with the character through ON DELETE CASCADE, so deleting one is a single statement
+    skills = db.relationship('CharacterSkill', backref='character', lazy=True, cascade='all, delete', passive_deletes=True)
     def __init__(self, *args, **kwargs):
         super(Character, self).__init__(*args, **kwargs)
         self.status_remaining = self.total_status
@@ -96,45 +111,52 @@ class Character(db.Model):
             self.status_spent = 0
         self.update_rank()
     def update_rank(self):
-        status_spent = self.status_spent or 0
-        if status_spent <= 5000:
-            self.rank = 1
-        elif status_spent <= 10000:
-            self.rank = 2
-        elif status_spent <= 15000:
-            self.rank = 3
-        elif status_spent <= 20000:
-            self.rank = 4
-        else:
-            self.rank = 5
+        self.rank = rank_for(self.status_spent)
 
 class CharacterSkill(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    character_id = db.Column(db.Integer, db.ForeignKey('character.id'), nullable=False)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id', ondelete='CASCADE'), nullable=False, index=True)
     skill_id = db.Column(db.Integer, db.ForeignKey('skill.id'), nullable=False)
     skill = db.relationship('Skill')
 
 class StatusAdjustment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    character_id = db.Column(db.Integer, db.ForeignKey('character.id'), nullable=False)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id', ondelete='CASCADE'), nullable=False)
     amount = db.Column(db.Integer, nullable=False)
     status_type = db.Column(db.String(20), nullable=False)
     notes = db.Column(db.Text)
     date = db.Column(db.DateTime, default=datetime.now(UTC))
     adjusted_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=True)
-    character = db.relationship('Character', backref='status_adjustments')
+    character = db.relationship('Character', backref=db.backref('status_adjustments', cascade='all, delete', passive_deletes=True))
     user = db.relationship('User', backref='status_adjustments_made')
     event = db.relationship('Event', backref='status_adjustments')
+    # Event processing checks look up adjustments by (event, character); history pages by character
+    __table_args__ = (
+        db.Index('ix_status_adjustment_event_character', 'event_id', 'character_id'),
+        db.Index('ix_status_adjustment_character_id', 'character_id'),
+    )
+
+class StatusTotal(db.Model):
+    """Running sum of StatusAdjustment amounts per character, status type and event"""
+    id = db.Column(db.Integer, primary_key=True)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id', ondelete='CASCADE'), nullable=False)
+    status_type = db.Column(db.String(20), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=True)
+    amount = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.Index('ix_status_total_character_type_event', 'character_id', 'status_type', 'event_id'),
+        db.Index('ix_status_total_event_character', 'event_id', 'character_id'),
+    )
 
 class StatusPurchase(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    character_id = db.Column(db.Integer, db.ForeignKey('character.id'), nullable=False)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id', ondelete='CASCADE'), nullable=False)
     amount = db.Column(db.Integer, default=100)
     price = db.Column(db.Float, default=10.00)
     date = db.Column(db.DateTime, default=datetime.now(UTC))
     status = db.Column(db.String(20), default='Pending')
-    character = db.relationship('Character', backref='status_purchases')
+    character = db.relationship('Character', backref=db.backref('status_purchases', cascade='all, delete', passive_deletes=True))
 
 class Skill(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -162,7 +184,7 @@ class EventParticipation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    character_id = db.Column(db.Integer, db.ForeignKey('character.id'), nullable=False)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id', ondelete='CASCADE'), nullable=False)
     timeblock = db.Column(db.Integer, nullable=False)
     service_performed = db.Column(db.Boolean, default=False)
     decorated_area = db.Column(db.Boolean, default=False)
@@ -170,22 +192,42 @@ class EventParticipation(db.Model):
     treasure_turned_in = db.Column(db.Integer, default=0)
     status_gained = db.Column(db.Integer, default=0)
     completed = db.Column(db.Boolean, default=False)
-    character = db.relationship('Character', backref='event_participations')
+    character = db.relationship('Character', backref=db.backref('event_participations', cascade='all, delete', passive_deletes=True))
     user = db.relationship('User', backref='event_participations')
+    # Signup and roster checks look up a user's bookings per event and timeblock
+    __table_args__ = (
+        db.Index('ix_event_participation_event_user_timeblock', 'event_id', 'user_id', 'timeblock'),
+    )
+
+class EventBooking(db.Model):
+    """A timeblock a user holds at an event, written alongside each EventParticipation or CastSignup row"""
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    timeblock = db.Column(db.Integer, nullable=False)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id', ondelete='CASCADE'), nullable=False, index=True)
+    # One booking per user and timeblock across both signup kinds, so concurrent double-submits fail atomically
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'user_id', 'timeblock', name='uq_event_booking_event_user_timeblock'),
+    )
 
 class CastSignup(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    character_id = db.Column(db.Integer, db.ForeignKey('character.id'), nullable=False)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id', ondelete='CASCADE'), nullable=False)
     timeblock = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), default='Pending')
     writing_status = db.Column(db.Integer, default=0)
     management_status = db.Column(db.Integer, default=0)
     notes = db.Column(db.Text)
-    character = db.relationship('Character', backref='cast_signups')
+    character = db.relationship('Character', backref=db.backref('cast_signups', cascade='all, delete', passive_deletes=True))
     user = db.relationship('User', backref='cast_signups')
     event = db.relationship('Event', backref='cast_signups')
+    # Pending cast review lists filter by event and status
+    __table_args__ = (
+        db.Index('ix_cast_signup_event_status', 'event_id', 'status'),
+    )
 
 class Complaint(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -204,4 +246,8 @@ class Complaint(db.Model):
     people_involved = db.Column(db.Text, nullable=True)
     complainant = db.relationship('User', foreign_keys=[complainant_id], backref='complaints_filed')
     accused = db.relationship('User', foreign_keys=[accused_id], backref='complaints_against')
-    arbitrator = db.relationship('User', foreign_keys=[arbitrator_id], backref='complaints_arbitrated') 
\ No newline at end of file
+    arbitrator = db.relationship('User', foreign_keys=[arbitrator_id], backref='complaints_arbitrated')
+    # The arbitration list filters by status, newest first
+    __table_args__ = (
+        db.Index('ix_complaint_status_date_filed', 'status', 'date_filed'),
+    )
@@ -0,0 +1,68 @@
+"""Announcement check: make sure the scheduler can receive create_event's notifications on the pinned driver.
+
+Run `python notify_check.py` against the app's Postgres database. It listens on the scheduler's channel,
+sends notifications from a second connection and fails unless wait_for_announcements returns them,
+including one that arrives while the listening connection is busy with another query.
+"""
+import sys
+from sqlalchemy import text
+from extensions import db
+from event_transitions import EVENT_SCHEDULE_CHANNEL
+from scheduler import wait_for_announcements
+
+# Larger than any real event id, so a running scheduler that sees these just finds no such event
+CHECK_EVENT_IDS = (2_000_000_001, 2_000_000_002)
+WAIT_SECONDS = 5
+
+
+def _notify(engine, event_id):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                     {'channel': EVENT_SCHEDULE_CHANNEL, 'payload': str(event_id)})
+        conn.commit()
+
+
+def check_announcements(engine):
+    """Run each check; returns a list of failure descriptions"""
+    failures = []
+    with engine.connect() as listener:
+        listener.execute(text(f"LISTEN {EVENT_SCHEDULE_CHANNEL}"))
+        listener.commit()
+
+        idle = wait_for_announcements(listener, 0.2)
+        if idle is None:
+            failures.append(f"driver {engine.dialect.driver} can't receive notifications")
+            return failures
+        if idle:
+            failures.append(f"unexpected announcements while idle: {sorted(idle)}")
+
+        waiting_id, busy_id = CHECK_EVENT_IDS
+        _notify(engine, waiting_id)
+        received = wait_for_announcements(listener, WAIT_SECONDS)
+        if waiting_id not in received:
+            failures.append(f"notification sent during the wait was not received (got {sorted(received)})")
+
+        # Arrives while the listener runs a query, as when the leader checks its lock between waits
+        _notify(engine, busy_id)
+        listener.execute(text("SELECT pg_sleep(0.2)"))
+        listener.commit()
+        received = wait_for_announcements(listener, WAIT_SECONDS)
+        if busy_id not in received:
+            failures.append(f"notification sent between waits was lost (got {sorted(received)})")
+    return failures
+
+
+if __name__ == '__main__':
+    from app import create_app
+    with create_app().app_context():
+        engine = db.engine
+        if engine.dialect.name != 'postgresql':
+            print(f"Note: {engine.dialect.name} has no LISTEN/NOTIFY; nothing to check")
+            sys.exit(0)
+        failures = check_announcements(engine)
+    print(f"Driver: {engine.dialect.driver}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("ok   announcements reach wait_for_announcements")
+    sys.exit(1 if failures else 0)
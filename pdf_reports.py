@@ -0,0 +1,115 @@
+from io import BytesIO
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from pdf_stream import concatenate_pdfs
+
+# Style sheet shared by every report, built once per process
+STYLES = getSampleStyleSheet()
+STYLES.add(ParagraphStyle(
+    name='SmallText',
+    parent=STYLES['Normal'],
+    fontSize=8,
+    leading=10
+))
+STYLES.add(ParagraphStyle(
+    name='SmallHeading',
+    parent=STYLES['Heading2'],
+    fontSize=10,
+    leading=12,
+    spaceAfter=2
+))
+
+# Tabular reports: shaded header row over a light grid
+DATA_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+# Label/value tables: shaded label column
+INFO_TABLE_STYLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('PADDING', (0, 0), (-1, -1), 4),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+])
+
+# Invisible table used to lay other tables out side by side
+CONTAINER_TABLE_STYLE = TableStyle([
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ('TOPPADDING', (0, 0), (-1, -1), 0),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+])
+
+
+def build_pdf(elements, margin=36):
+    """Lay out flowables on letter pages and return a BytesIO positioned at the start"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin)
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
+
+
+def data_table(header, rows, col_widths=None):
+    """Left-aligned table with a shaded header row"""
+    table = Table([header] + list(rows), colWidths=col_widths, hAlign='LEFT')
+    table.setStyle(DATA_TABLE_STYLE)
+    return table
+
+
+def tabular_report(title, lines=(), sections=(), margin=36):
+    """Render a titled report from (text, style) lines and (heading, header, rows, empty message) sections"""
+    elements = [Paragraph(title, STYLES['Title'])]
+    for text, style in lines:
+        elements.append(Paragraph(text, STYLES[style]))
+    elements.append(Spacer(1, 12))
+    for index, (heading, header, rows, empty_message) in enumerate(sections):
+        if index:
+            elements.append(Spacer(1, 16))
+        if heading:
+            elements.append(Paragraph(heading, STYLES['Heading2']))
+        rows = list(rows)
+        if rows:
+            elements.append(data_table(header, rows))
+        else:
+            elements.append(Paragraph(empty_message, STYLES['Normal']))
+    return build_pdf(elements, margin=margin)
+
+
+def stream_tabular_report(title, lines, header, rows, col_widths=None, empty_message='No rows.',
+                          rows_per_table=35, rows_per_document=2000, margin=36):
+    """Yield a single-table report as PDF bytes, rendering rows_per_document rows at a time"""
+    # Long tables are laid out as fixed-size tables that each fit on a page, which keeps
+    # ReportLab from repeatedly splitting one giant table; each batch of rows is rendered
+    # as its own document and stitched into the output as soon as it is ready
+    def documents():
+        batch = []
+        first = True
+        for row in rows:
+            batch.append(row)
+            if len(batch) == rows_per_document:
+                yield render(batch, first)
+                batch = []
+                first = False
+        if batch or first:
+            yield render(batch, first)
+
+    def render(batch, first):
+        elements = []
+        if first:
+            elements.append(Paragraph(title, STYLES['Title']))
+            for text, style in lines:
+                elements.append(Paragraph(text, STYLES[style]))
+            elements.append(Spacer(1, 12))
+            if not batch:
+                elements.append(Paragraph(empty_message, STYLES['Normal']))
+        for start in range(0, len(batch), rows_per_table):
+            elements.append(data_table(header, batch[start:start + rows_per_table], col_widths=col_widths))
+        return build_pdf(elements, margin=margin).getvalue()
+
+    return concatenate_pdfs(documents())
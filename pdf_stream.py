@@ -0,0 +1,82 @@
+import re
+
+_STARTXREF_RE = re.compile(rb'startxref\s+(\d+)\s+%%EOF\s*$')
+_ROOT_RE = re.compile(rb'/Root (\d+) 0 R')
+_PAGES_RE = re.compile(rb'/Pages (\d+) 0 R')
+_COUNT_RE = re.compile(rb'/Count (\d+)')
+_REF_RE = re.compile(rb'(\d+) 0 R')
+_STREAM_RE = re.compile(rb'>>\s*stream\r?\n')
+
+
+def _parse_pdf(pdf):
+    """Split a single-revision PDF (as written by ReportLab) into its objects and trailer"""
+    xref_offset = int(_STARTXREF_RE.search(pdf).group(1))
+    xref, _, trailer = pdf[xref_offset:].partition(b'trailer')
+    tokens = xref.split()
+    start, count = int(tokens[1]), int(tokens[2])
+    offsets = []
+    for i in range(count):
+        offset, _, kind = tokens[3 + 3 * i:6 + 3 * i]
+        if kind == b'n':
+            offsets.append((int(offset), start + i))
+    offsets.sort()
+    objects = {}
+    for index, (offset, number) in enumerate(offsets):
+        end = offsets[index + 1][0] if index + 1 < len(offsets) else xref_offset
+        body = pdf[offset:end]
+        objects[number] = body[body.index(b'obj') + 3:body.rindex(b'endobj')]
+    return objects, trailer
+
+
+def _renumber(body, base):
+    """Shift object references in an object body by base, leaving stream data untouched"""
+    match = _STREAM_RE.search(body)
+    head, data = (body[:match.end()], body[match.end():]) if match else (body, b'')
+    return _REF_RE.sub(lambda ref: b'%d 0 R' % (int(ref.group(1)) + base), head) + data
+
+
+def concatenate_pdfs(documents):
+    """Yield a single PDF built from an iterable of PDFs, writing each document out as soon as it arrives"""
+    # Each input's page tree is hung under a new root Pages node (object 1), so only byte
+    # offsets are kept between documents; the root and the Catalog (object 2) go out last
+    header = b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n'
+    yield header
+    position = len(header)
+    offsets = {}
+    kids = []
+    page_count = 0
+    base = 2
+    for pdf in documents:
+        objects, trailer = _parse_pdf(pdf)
+        root = int(_ROOT_RE.search(trailer).group(1))
+        pages = int(_PAGES_RE.search(objects[root]).group(1))
+        page_count += int(_COUNT_RE.search(objects[pages]).group(1))
+        kids.append(pages + base)
+        chunks = []
+        for number in sorted(objects):
+            body = _renumber(objects[number], base)
+            if number == pages:
+                body = body.replace(b'<<', b'<<\n/Parent 1 0 R', 1)
+            chunk = b'%d 0 obj' % (number + base) + body + b'endobj\n'
+            offsets[number + base] = position
+            position += len(chunk)
+            chunks.append(chunk)
+        base += max(objects)
+        yield b''.join(chunks)
+    kid_refs = b' '.join(b'%d 0 R' % kid for kid in kids)
+    closing = [
+        b'1 0 obj\n<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>\nendobj\n' % (page_count, kid_refs),
+        b'2 0 obj\n<<\n/Pages 1 0 R /Type /Catalog\n>>\nendobj\n'
+    ]
+    for number, chunk in enumerate(closing, start=1):
+        offsets[number] = position
+        position += len(chunk)
+    size = base + 1
+    xref = [b'xref\n0 %d\n' % size, b'0000000000 65535 f \n']
+    for number in range(1, size):
+        if number in offsets:
+            xref.append(b'%010d 00000 n \n' % offsets[number])
+        else:
+            xref.append(b'0000000000 65535 f \n')
+    trailer = b'trailer\n<<\n/Root 2 0 R /Size %d\n>>\nstartxref\n%d\n%%%%EOF\n' % (size, position)
+    yield b''.join(closing) + b''.join(xref) + trailer
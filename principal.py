@@ -0,0 +1,65 @@
+import time
+from threading import Lock
+from flask import current_app
+from extensions import db
+from models import User, MembershipMixin
+
+# How long a process reuses a principal before re-reading the user; override with PRINCIPAL_CACHE_TTL
+DEFAULT_PRINCIPAL_TTL = 30
+# Past this many cached users, expired entries are pruned on the next store
+MAX_CACHED_PRINCIPALS = 1024
+
+PRINCIPAL_FIELDS = (
+    'id', 'first_name', 'last_name',
+    'is_admin', 'is_moderator', 'can_create_events', 'can_add_event_status',
+    'can_adjust_character_status', 'can_accept_cast', 'can_arbitrate',
+    'membership_level', 'membership_expiry'
+)
+
+
+class Principal(MembershipMixin):
+    """Read-only session user: identity, permission flags and membership, without the rest of the User row.
+    Load the User itself (db.session.get(User, current_user.id)) to change anything."""
+    __slots__ = PRINCIPAL_FIELDS
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, **fields):
+        for name in PRINCIPAL_FIELDS:
+            setattr(self, name, fields[name])
+
+    def get_id(self):
+        return str(self.id)
+
+
+_lock = Lock()
+_cache = {}
+
+
+def get_principal(user_id):
+    """Return the principal for a user id, from the per-process cache while it is fresh; None if no such user"""
+    now = time.monotonic()
+    entry = _cache.get(user_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    row = db.session.query(*(getattr(User, name) for name in PRINCIPAL_FIELDS)).filter(User.id == user_id).first()
+    if row is None:
+        forget_principal(user_id)
+        return None
+    principal = Principal(**row._asdict())
+    ttl = current_app.config.get('PRINCIPAL_CACHE_TTL', DEFAULT_PRINCIPAL_TTL)
+    with _lock:
+        if len(_cache) >= MAX_CACHED_PRINCIPALS:
+            for stale_id in [key for key, (expires, _) in _cache.items() if expires <= now]:
+                del _cache[stale_id]
+        _cache[user_id] = (now + ttl, principal)
+    return principal
+
+
+def forget_principal(user_id):
+    """Drop a cached principal; call after committing changes to the user's permissions, membership or name.
+    Other worker processes pick the change up when their copy expires."""
+    with _lock:
+        _cache.pop(user_id, None)
@@ -0,0 +1,123 @@
+"""Event status transitions, run as their own process: `python scheduler.py`
+
+Web workers created with create_app() carry no scheduler threads. Any number of scheduler processes may
+be started; a Postgres advisory lock makes exactly one of them the leader, and the others stand by and
+take over if the leader's database connection goes away.
+
+The leader keeps a min-heap of event start/end boundaries (see event_transitions) and sleeps until the
+next one, moving just that event to its new status. create_event announces new events over
+LISTEN/NOTIFY on the lock connection, so they are armed right away instead of on the next poll.
+"""
+import select
+import time
+from datetime import datetime
+from sqlalchemy import text
+from extensions import db
+from event_transitions import EventTransitions, EVENT_SCHEDULE_CHANNEL
+
+# Arbitrary application-wide key for pg_try_advisory_lock
+SCHEDULER_LOCK_ID = 727_465_001
+# How often the leader checks it still holds the lock, and standbys retry for it
+LEASE_CHECK_SECONDS = 30
+# Full reload of the heap as a safety net for changes made without a notification (e.g. by hand in SQL)
+RESYNC_SECONDS = 60 * 60
+
+
+def acquire_leader_lock(engine):
+    """Return a connection holding the scheduler lock, or None if another instance holds it"""
+    conn = engine.connect()
+    if engine.dialect.name != 'postgresql':
+        # No advisory locks (e.g. SQLite in development): only start one scheduler process
+        print("Note: database has no advisory locks; assuming this is the only scheduler")
+        return conn
+    try:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:lock_id)"), {'lock_id': SCHEDULER_LOCK_ID}).scalar()
+        if acquired:
+            conn.execute(text(f"LISTEN {EVENT_SCHEDULE_CHANNEL}"))
+        # The lock and LISTEN are session-level, so they survive the end of this transaction
+        conn.commit()
+    except Exception:
+        conn.close()
+        raise
+    if acquired:
+        return conn
+    conn.close()
+    return None
+
+
+def lock_alive(conn):
+    """True while the connection holding the lock is still usable"""
+    try:
+        conn.execute(text("SELECT 1"))
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"Lost scheduler lock connection: {e}")
+        conn.invalidate()
+        return False
+
+
+def wait_for_announcements(conn, timeout):
+    """Wait up to timeout seconds for announced event ids; None means they can't be received on this database"""
+    raw = conn.connection.dbapi_connection
+    notifies = getattr(raw, 'notifies', None)
+    if callable(notifies):
+        # psycopg 3: a generator that waits, yielding anything that arrived since the last wait first
+        payloads = [notify.payload for notify in notifies(timeout=timeout, stop_after=1)]
+    elif notifies is not None:
+        # psycopg2: a list that poll() fills
+        if not notifies and select.select([raw], [], [], timeout)[0]:
+            raw.poll()
+        payloads = [notify.payload for notify in notifies]
+        notifies.clear()
+    else:
+        time.sleep(timeout)
+        return None
+    event_ids = set()
+    for payload in payloads:
+        try:
+            event_ids.add(int(payload))
+        except ValueError:
+            pass
+    return event_ids
+
+
+def lead(app, lock):
+    """Apply event transitions as they fall due for as long as this process holds the lock"""
+    transitions = EventTransitions()
+    with app.app_context():
+        transitions.load()
+        synced_at = time.monotonic()
+        while lock_alive(lock):
+            transitions.run_due(datetime.now())
+            wait = transitions.seconds_until_next(datetime.now())
+            wait = LEASE_CHECK_SECONDS if wait is None else min(wait, LEASE_CHECK_SECONDS)
+            event_ids = wait_for_announcements(lock, wait)
+            if event_ids is None or time.monotonic() - synced_at > RESYNC_SECONDS:
+                transitions.load()
+                synced_at = time.monotonic()
+            else:
+                for event_id in event_ids:
+                    transitions.rearm(event_id)
+            db.session.remove()
+
+
+def run(app):
+    """Stand by until this process holds the scheduler lock, then lead until the lock is lost"""
+    with app.app_context():
+        engine = db.engine
+    while True:
+        lock = acquire_leader_lock(engine)
+        if lock is None:
+            time.sleep(LEASE_CHECK_SECONDS)
+            continue
+        print("Acquired scheduler lock; applying event status transitions")
+        try:
+            lead(app, lock)
+        finally:
+            lock.close()
+
+
+if __name__ == '__main__':
+    from app import create_app
+    run(create_app())
@@ -0,0 +1,67 @@
+from collections import namedtuple
+from threading import Lock
+from types import MappingProxyType
+from models import Skill
+
+# Read-only copy of a Skill row, safe to share between requests
+SkillEntry = namedtuple('SkillEntry', ['id', 'lore_category', 'sub_category', 'name', 'cost', 'rank', 'resources'])
+
+
+class SkillCatalog:
+    """Immutable snapshot of the skill table, pre-grouped for the character pages"""
+
+    def __init__(self, version, skills):
+        self.version = version
+        self.skills = tuple(skills)
+        self.by_id = MappingProxyType({skill.id: skill for skill in self.skills})
+        grouped = {}
+        for skill in self.skills:
+            grouped.setdefault(skill.lore_category, {}).setdefault(skill.sub_category, []).append(skill)
+        self.skills_by_category = MappingProxyType({
+            category: tuple(skill for skills in subcategories.values() for skill in skills)
+            for category, subcategories in grouped.items()
+        })
+        self.skills_by_subcategory = MappingProxyType({
+            category: MappingProxyType({sub: tuple(skills) for sub, skills in subcategories.items()})
+            for category, subcategories in grouped.items()
+        })
+
+    def resolve(self, skill_ids):
+        """Map submitted skill ids to catalog entries, skipping duplicates and unknown ids"""
+        resolved = {}
+        for skill_id in skill_ids:
+            try:
+                skill = self.by_id.get(int(skill_id))
+            except (ValueError, TypeError):
+                continue
+            if skill is not None:
+                resolved[skill.id] = skill
+        return list(resolved.values())
+
+
+_lock = Lock()
+_version = 0
+_catalog = None
+
+
+def get_skill_catalog():
+    """Return the current catalog snapshot, loading it from the database if it is stale"""
+    global _catalog
+    catalog = _catalog
+    if catalog is not None and catalog.version == _version:
+        return catalog
+    with _lock:
+        if _catalog is None or _catalog.version != _version:
+            rows = Skill.query.order_by(Skill.id).all()
+            _catalog = SkillCatalog(_version, (
+                SkillEntry(s.id, s.lore_category, s.sub_category, s.name, s.cost, s.rank, s.resources or 0)
+                for s in rows
+            ))
+        return _catalog
+
+
+def invalidate_skill_catalog():
+    """Bump the catalog version so the next reader reloads it; call after writing skills"""
+    global _version
+    with _lock:
+        _version += 1
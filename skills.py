@@ -1,80 +1,98 @@
 from flask import Blueprint
-import pandas as pd
+from sqlalchemy import insert, update
 from flask import current_app
 from extensions import db
 from models import Skill
+from skill_catalog import invalidate_skill_catalog
+from excel_snapshots import load_sheet
 
 skills_bp = Blueprint('skills', __name__)
 
+SKILLS_XLSX = 'skills.xlsx'
+SKILL_KEY = ['lore_category', 'sub_category', 'name']
+SKILL_VALUES = ['cost', 'rank', 'resources']
 
-def load_skills_from_excel():
+
+def _to_int(column, clean_text=True):
+    """Coerce a column to whole numbers, optionally retrying text cells on just their digits; NA where that fails"""
+    import numpy as np
+    import pandas as pd
+    numeric = pd.to_numeric(column, errors='coerce').astype(float)
+    if clean_text:
+        text = column[numeric.isna() & column.notna()].astype(str)
+        numeric[text.index] = pd.to_numeric(text.str.replace(r'[^0-9.]', '', regex=True), errors='coerce')
+    # int() truncates, so do the same for fractional values
+    return np.trunc(numeric).astype('Int64')
+
+
+def _to_text(column):
+    # Blank cells have always been stored as the string 'nan'; keep that so existing rows still match
+    return column.astype(object).where(column.notna(), 'nan').astype(str).str.strip()
+
+
+def clean_skills_frame(df):
+    """Turn the raw skills sheet into one row per skill with typed cost, rank and resources"""
+    import pandas as pd
+    required_columns = ['Lore Category', 'Sub Category', 'Skill Name', 'Status']
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns in Excel file: {', '.join(missing_columns)}")
+    skills = pd.DataFrame({
+        'lore_category': _to_text(df['Lore Category']),
+        'sub_category': _to_text(df['Sub Category']),
+        'name': _to_text(df['Skill Name']),
+        'cost': _to_int(df['Status']),
+        'rank': _to_int(df['Rank'], clean_text=False) if 'Rank' in df.columns else pd.Series(pd.NA, index=df.index, dtype='Int64'),
+        'resources': _to_int(df['Resources']).fillna(0) if 'Resources' in df.columns else pd.Series(0, index=df.index, dtype='Int64')
+    })
+    invalid = skills['cost'].isna()
+    # Later rows win when the sheet lists the same skill twice
+    skills = skills[~invalid].drop_duplicates(SKILL_KEY, keep='last')
+    return skills, int(invalid.sum())
+
+
+def load_skills_from_excel(path=SKILLS_XLSX):
+    """Upsert every skill in the workbook and return a summary of what changed"""
+    # pandas is only needed here and costs every worker ~0.5s to import, so load it on first use
+    import pandas as pd
     try:
         print("Attempting to load skills from Excel...")
-        df = pd.read_excel('skills.xlsx')
-        print("Excel columns found:", df.columns.tolist())
-        print("\nFirst few rows of data:")
-        print(df.head())
-        required_columns = ['Lore Category', 'Sub Category', 'Skill Name', 'Status']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            raise ValueError(f"Missing required columns in Excel file: {', '.join(missing_columns)}")
-        for index, row in df.iterrows():
-            try:
-                lore_category = str(row['Lore Category']).strip()
-                sub_category = str(row['Sub Category']).strip()
-                skill_name = str(row['Skill Name']).strip()
-                try:
-                    cost = int(row['Status'])
-                except (ValueError, TypeError):
-                    status_str = str(row['Status']).strip()
-                    status_str = ''.join(c for c in status_str if c.isdigit() or c == '.')
-                    if status_str:
-                        cost = int(float(status_str))
-                    else:
-                        print(f"Warning: Invalid status value for skill '{skill_name}': {row['Status']}")
-                        continue
-                rank = None
-                if 'Rank' in df.columns and pd.notna(row.get('Rank')):
-                    try:
-                        rank = int(row['Rank'])
-                    except (ValueError, TypeError):
-                        print(f"Warning: Invalid rank value for skill '{skill_name}': {row.get('Rank')}")
-                resources = 0
-                if 'Resources' in df.columns and pd.notna(row.get('Resources')):
-                    try:
-                        resources = int(row['Resources'])
-                    except (ValueError, TypeError):
-                        resources_str = str(row['Resources']).strip()
-                        resources_str = ''.join(c for c in resources_str if c.isdigit() or c == '.')
-                        if resources_str:
-                            resources = int(float(resources_str))
-                existing_skill = Skill.query.filter_by(
-                    lore_category=lore_category,
-                    sub_category=sub_category,
-                    name=skill_name
-                ).first()
-                if not existing_skill:
-                    skill = Skill(
-                        lore_category=lore_category,
-                        sub_category=sub_category,
-                        name=skill_name,
-                        cost=cost,
-                        rank=rank,
-                        resources=resources
-                    )
-                    db.session.add(skill)
-                    print(f"Added skill: {skill_name} ({lore_category} - {sub_category}) with cost {cost} and resources {resources}")
-                else:
-                    existing_skill.cost = cost
-                    existing_skill.rank = rank
-                    existing_skill.resources = resources
-                    print(f"Updated skill: {skill_name} ({lore_category} - {sub_category}) to cost {cost}, rank {rank}, resources {resources}")
-            except Exception as row_error:
-                print(f"Error processing row {index + 2}: {str(row_error)}")
-                continue
+        skills, skipped = clean_skills_frame(pd.DataFrame(load_sheet(path)))
+        existing = pd.DataFrame(
+            db.session.query(Skill.id, Skill.lore_category, Skill.sub_category, Skill.name, Skill.cost, Skill.rank, Skill.resources).all(),
+            columns=['id'] + SKILL_KEY + [f'{col}_db' for col in SKILL_VALUES]
+        )
+        merged = skills.merge(existing, on=SKILL_KEY, how='left')
+        is_new = merged['id'].isna()
+        changed = pd.Series(False, index=merged.index)
+        for col in SKILL_VALUES:
+            current = merged[f'{col}_db'].astype('Int64')
+            changed |= (merged[col].fillna(-1) != current.fillna(-1))
+        changed &= ~is_new
+        added = merged.loc[is_new, SKILL_KEY + SKILL_VALUES]
+        updated = merged.loc[changed, ['id'] + SKILL_VALUES]
+        if len(added):
+            db.session.execute(insert(Skill), _records(added))
+        if len(updated):
+            updated = updated.assign(id=updated['id'].astype(int))
+            db.session.execute(update(Skill), _records(updated))
         db.session.commit()
-        print("\nSuccessfully loaded all skills from Excel file!")
+        invalidate_skill_catalog()
+        summary = {
+            'added': int(len(added)),
+            'updated': int(len(updated)),
+            'unchanged': int(len(merged) - len(added) - len(updated)),
+            'skipped': skipped
+        }
+        print(f"Loaded skills from Excel: {summary['added']} added, {summary['updated']} updated, "
+              f"{summary['unchanged']} unchanged, {summary['skipped']} skipped (invalid status)")
+        return summary
     except Exception as e:
         print(f"Error loading skills: {str(e)}")
         db.session.rollback()
-        raise 
\ No newline at end of file
+        raise
+
+
+def _records(frame):
+    """DataFrame rows as plain dicts with None for missing values, ready for a bulk statement"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
@@ -0,0 +1,79 @@
+from bisect import bisect_left
+from collections import namedtuple
+from types import MappingProxyType
+
+# Status every new character starts with
+STARTING_STATUS = 5000
+MAX_HEALTH = 10
+MAX_STAMINA = 25
+HEALTH_COST_PER_LEVEL = 200
+# (last stamina level in the tier, cost of each level in it); levels past the last tier cost its price
+STAMINA_TIERS = ((5, 100), (10, 200), (15, 300), (20, 400), (MAX_STAMINA, 500))
+# Status spent up to and including each threshold keeps the character at that rank (1-based); above the last is rank 5
+RANK_THRESHOLDS = (5000, 10000, 15000, 20000)
+
+
+def _stamina_costs():
+    costs = [0]
+    for level in range(1, MAX_STAMINA + 1):
+        per_level = next(cost for last_level, cost in STAMINA_TIERS if level <= last_level)
+        costs.append(costs[-1] + per_level)
+    return tuple(costs)
+
+
+# Total cost of buying up to each level, indexed by level
+HEALTH_COSTS = tuple(level * HEALTH_COST_PER_LEVEL for level in range(MAX_HEALTH + 1))
+STAMINA_COSTS = _stamina_costs()
+
+# What the character builder pages need to price a build in the browser
+STATUS_COST_TABLES = MappingProxyType({
+    'health': HEALTH_COSTS,
+    'stamina': STAMINA_COSTS,
+    'rank_thresholds': RANK_THRESHOLDS,
+})
+
+BuildPrice = namedtuple('BuildPrice', [
+    'health', 'stamina', 'health_cost', 'stamina_cost', 'skill_cost',
+    'total_spent', 'status_remaining', 'rank', 'resources', 'skills'
+])
+
+
+def rank_for(status_spent):
+    """Rank for an amount of spent status"""
+    return bisect_left(RANK_THRESHOLDS, status_spent or 0) + 1
+
+
+def _level_cost(costs, level, label):
+    if not 0 <= level < len(costs):
+        raise ValueError(f'{label} must be between 0 and {len(costs) - 1}')
+    return costs[level]
+
+
+def price_skills(skill_ids, catalog):
+    """Resolve skill ids against the catalog; returns (skill entries, status cost, resources)"""
+    skills = catalog.resolve(skill_ids)
+    cost = 0
+    resources = 0
+    for skill in skills:
+        cost += skill.cost
+        resources += skill.resources
+    return skills, cost, resources
+
+
+def price_build(total_status, health, stamina, skill_ids, catalog):
+    """Price a health/stamina/skill build against total_status from the lookup tables, without touching the database.
+    Raises ValueError for health or stamina outside the purchasable range."""
+    health, stamina = int(health), int(stamina)
+    health_cost = _level_cost(HEALTH_COSTS, health, 'Health')
+    stamina_cost = _level_cost(STAMINA_COSTS, stamina, 'Stamina')
+    skills, skill_cost, resources = price_skills(skill_ids, catalog)
+    total_spent = health_cost + stamina_cost + skill_cost
+    return BuildPrice(health, stamina, health_cost, stamina_cost, skill_cost, total_spent, total_status - total_spent,
+                      rank_for(total_spent), resources, skills)
+
+
+def price_summary(price):
+    """JSON-ready form of a BuildPrice, with skills as their ids"""
+    summary = price._asdict()
+    summary['skills'] = [skill.id for skill in price.skills]
+    return summary
@@ -0,0 +1,60 @@
+from sqlalchemy import func, or_, select, insert
+from extensions import db
+from models import StatusAdjustment, StatusTotal
+
+
+def record_status_totals(entries):
+    """Fold (character_id, status_type, event_id, amount) entries into StatusTotal in the caller's transaction"""
+    deltas = {}
+    for character_id, status_type, event_id, amount in entries:
+        key = (int(character_id), status_type, int(event_id) if event_id is not None else None)
+        deltas[key] = deltas.get(key, 0) + amount
+    if not deltas:
+        return
+    character_ids = {key[0] for key in deltas}
+    event_ids = {key[2] for key in deltas if key[2] is not None}
+    event_filters = []
+    if event_ids:
+        event_filters.append(StatusTotal.event_id.in_(event_ids))
+    if any(key[2] is None for key in deltas):
+        event_filters.append(StatusTotal.event_id.is_(None))
+    existing = {
+        (total.character_id, total.status_type, total.event_id): total
+        for total in StatusTotal.query.filter(
+            StatusTotal.character_id.in_(character_ids),
+            or_(*event_filters)
+        )
+    }
+    for key, amount in deltas.items():
+        total = existing.get(key)
+        if total is not None:
+            # Increment in SQL so concurrent writers don't overwrite each other
+            total.amount = StatusTotal.amount + amount
+        else:
+            character_id, status_type, event_id = key
+            db.session.add(StatusTotal(
+                character_id=character_id,
+                status_type=status_type,
+                event_id=event_id,
+                amount=amount
+            ))
+
+
+def rebuild_status_totals():
+    """Recompute StatusTotal from the full StatusAdjustment ledger"""
+    StatusTotal.query.delete()
+    db.session.execute(
+        insert(StatusTotal).from_select(
+            ['character_id', 'status_type', 'event_id', 'amount'],
+            select(
+                StatusAdjustment.character_id,
+                StatusAdjustment.status_type,
+                StatusAdjustment.event_id,
+                func.sum(StatusAdjustment.amount)
+            ).group_by(
+                StatusAdjustment.character_id,
+                StatusAdjustment.status_type,
+                StatusAdjustment.event_id
+            )
+        )
+    )
@@ -1,14 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify
 from flask_login import login_required, current_user, UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import func, insert, select
 from extensions import db
-from datetime import datetime, UTC
-from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from models import User, Character, CharacterSkill, Skill, StatusAdjustment, StatusPurchase, EventParticipation, CastSignup
+from datetime import datetime, timedelta, UTC
+from models import User, Character, CharacterSkill, StatusAdjustment, StatusTotal, StatusPurchase
+from status_ledger import record_status_totals
+from character_sheets import refresh_character_sheets, drop_character_sheets
+from skill_catalog import get_skill_catalog
+from status_costs import price_build, price_skills, price_summary, STATUS_COST_TABLES, STARTING_STATUS
+from principal import forget_principal
 
 users_bp = Blueprint('users', __name__)
 
@@ -19,18 +20,40 @@ SPECIES_BY_REALM = {
     'Tyrs': ['Human', 'Ghoul', 'Airadin']
 }
 
+def sync_character_skills(character, selected_skills):
+    """Add and remove only the CharacterSkill rows that differ from the selected skills"""
+    current_ids = {cs.skill_id for cs in character.skills}
+    selected_ids = {skill.id for skill in selected_skills}
+    removed_ids = current_ids - selected_ids
+    added_ids = selected_ids - current_ids
+    if removed_ids:
+        CharacterSkill.query.filter(
+            CharacterSkill.character_id == character.id,
+            CharacterSkill.skill_id.in_(removed_ids)
+        ).delete(synchronize_session=False)
+    if added_ids:
+        db.session.execute(
+            insert(CharacterSkill),
+            [{'character_id': character.id, 'skill_id': skill_id} for skill_id in sorted(added_ids)]
+        )
+    if removed_ids or added_ids:
+        db.session.expire(character, ['skills'])
+
 # User and character routes will be added here 
 
 @users_bp.route('/my_characters')
 @login_required
 def my_characters():
     characters = Character.query.filter_by(user_id=current_user.id).all()
-    return render_template('my_characters.html', characters=characters)
+    return render_template('my_characters.html', characters=characters,
+                           editable_ids=current_user.editable_character_ids())
 
 @users_bp.route('/membership')
 @login_required
 def membership():
-    return render_template('membership.html')
+    characters = Character.query.filter_by(user_id=current_user.id).order_by(Character.id).all()
+    return render_template('membership.html', characters=characters,
+                           editable_ids=current_user.editable_character_ids())
 
 @users_bp.route('/membership/subscribe', methods=['GET', 'POST'])
 @login_required
@@ -43,10 +66,12 @@ def subscribe_membership():
             return redirect(url_for('users.membership'))
         
         # Set membership level and expiry (1 year from now)
-        current_user.membership_level = membership_level
-        current_user.membership_expiry = datetime.now(UTC).replace(year=datetime.now(UTC).year + 1)
+        user = db.session.get(User, current_user.id)
+        user.membership_level = membership_level
+        user.membership_expiry = datetime.now(UTC).replace(year=datetime.now(UTC).year + 1)
         
         db.session.commit()
+        forget_principal(user.id)
         flash(f'Successfully subscribed to {membership_level} membership!')
         return redirect(url_for('users.membership'))
     
@@ -76,9 +101,11 @@ def upgrade_membership():
             return redirect(url_for('users.membership'))
         
         # Update membership level, keep existing expiry date
-        current_user.membership_level = new_level
+        user = db.session.get(User, current_user.id)
+        user.membership_level = new_level
         
         db.session.commit()
+        forget_principal(user.id)
         flash(f'Successfully upgraded to {new_level} membership!')
         return redirect(url_for('users.membership'))
     
@@ -92,18 +119,34 @@ def cancel_membership():
         return redirect(url_for('users.membership'))
     
     # Set membership to None and clear expiry
-    current_user.membership_level = 'None'
-    current_user.membership_expiry = None
+    user = db.session.get(User, current_user.id)
+    user.membership_level = 'None'
+    user.membership_expiry = None
     
     db.session.commit()
+    forget_principal(user.id)
     flash('Your membership has been cancelled. You can still view your characters but cannot edit them.')
     return redirect(url_for('users.membership'))
 
+def price_submitted_build(character, form):
+    """Price the health, stamina and skills submitted for a character from the cost tables and skill catalog"""
+    return price_build(character.total_status, form.get('health', 0), form.get('stamina', 0),
+                       form.getlist('skills'), get_skill_catalog())
+
+def apply_build(character, price):
+    """Write a priced build to the character and its skill rows"""
+    character.health = price.health
+    character.stamina = price.stamina
+    sync_character_skills(character, price.skills)
+    character.status_spent = price.total_spent
+    character.status_remaining = price.status_remaining
+    character.rank = price.rank
+
 @users_bp.route('/create_character', methods=['GET', 'POST'])
 @login_required
 def create_character():
     # Check character limit
-    current_character_count = len(current_user.characters)
+    current_character_count = Character.query.filter_by(user_id=current_user.id).count()
     character_limit = current_user.get_character_limit()
     
     if current_character_count >= character_limit:
@@ -140,40 +183,13 @@ def creating_character(character_id):
             character.name = request.form.get('name')
             character.species = request.form.get('species')
             character.group_name = request.form.get('group')
-            character.health = int(request.form.get('health', 0))
-            character.stamina = int(request.form.get('stamina', 0))
-            total_spent = 0
-            total_spent += character.health * 200
-            stamina = character.stamina
-            if stamina > 0:
-                if stamina <= 5:
-                    total_spent += stamina * 100
-                elif stamina <= 10:
-                    total_spent += 500 + (stamina - 5) * 200
-                elif stamina <= 15:
-                    total_spent += 1500 + (stamina - 10) * 300
-                elif stamina <= 20:
-                    total_spent += 3000 + (stamina - 15) * 400
-                else:
-                    total_spent += 5000 + (stamina - 20) * 500
-            selected_skills = request.form.getlist('skills')
-            CharacterSkill.query.filter_by(character_id=character.id).delete()
-            for skill_id in selected_skills:
-                skill = Skill.query.get(skill_id)
-                if skill:
-                    character_skill = CharacterSkill(
-                        character_id=character.id,
-                        skill_id=skill.id
-                    )
-                    db.session.add(character_skill)
-                    total_spent += skill.cost
-            character.status_spent = total_spent
-            character.status_remaining = character.total_status - total_spent
-            character.update_rank()
-            if total_spent > character.total_status:
+            price = price_submitted_build(character, request.form)
+            if price.status_remaining < 0:
                 flash('Error: Total status spent exceeds available status points')
                 return redirect(url_for('users.creating_character', character_id=character.id))
+            apply_build(character, price)
             db.session.commit()
+            refresh_character_sheets([character.id])
             flash('Character created successfully!')
             return redirect(url_for('users.my_characters'))
         except Exception as e:
@@ -181,23 +197,15 @@ def creating_character(character_id):
             flash(f'Error creating character: {str(e)}')
             return redirect(url_for('users.creating_character', character_id=character.id))
     
-    skills = Skill.query.all()
-    skills_by_category = {}
-    skills_by_subcategory = {}
-    for skill in skills:
-        if skill.lore_category not in skills_by_category:
-            skills_by_category[skill.lore_category] = []
-            skills_by_subcategory[skill.lore_category] = {}
-        if skill.sub_category not in skills_by_subcategory[skill.lore_category]:
-            skills_by_subcategory[skill.lore_category][skill.sub_category] = []
-        skills_by_subcategory[skill.lore_category][skill.sub_category].append(skill)
-    character_skills = [cs.skill_id for cs in character.skills]
+    catalog = get_skill_catalog()
+    character_skills = {cs.skill_id for cs in character.skills}
     return render_template('creating_character.html',
                          character=character,
                          species_by_realm=SPECIES_BY_REALM,
-                         skills_by_category=skills_by_category,
-                         skills_by_subcategory=skills_by_subcategory,
-                         character_skills=character_skills)
+                         skills_by_category=catalog.skills_by_category,
+                         skills_by_subcategory=catalog.skills_by_subcategory,
+                         character_skills=character_skills,
+                         status_costs=dict(STATUS_COST_TABLES))
 
 @users_bp.route('/edit_character/<int:character_id>', methods=['GET', 'POST'])
 @login_required
@@ -207,8 +215,7 @@ def edit_character(character_id):
         return redirect(url_for('users.my_characters'))
     
     # Check if user can edit this character based on membership
-    editable_characters = current_user.get_editable_characters()
-    if character not in editable_characters:
+    if not current_user.can_edit_character(character.id):
         flash('You cannot edit this character with your current membership level. Please upgrade your membership to edit more characters.')
         return redirect(url_for('users.view_character', character_id=character.id))
     if request.method == 'POST':
@@ -216,63 +223,73 @@ def edit_character(character_id):
             character.name = request.form.get('name')
             character.species = request.form.get('species')
             character.group_name = request.form.get('group')
-            character.health = int(request.form.get('health', 0))
-            character.stamina = int(request.form.get('stamina', 0))
-            total_spent = 0
-            total_spent += character.health * 200
-            stamina = character.stamina
-            if stamina > 0:
-                if stamina <= 5:
-                    total_spent += stamina * 100
-                elif stamina <= 10:
-                    total_spent += 500 + (stamina - 5) * 200
-                elif stamina <= 15:
-                    total_spent += 1500 + (stamina - 10) * 300
-                elif stamina <= 20:
-                    total_spent += 3000 + (stamina - 15) * 400
-                else:
-                    total_spent += 5000 + (stamina - 20) * 500
-            selected_skills = request.form.getlist('skills')
-            CharacterSkill.query.filter_by(character_id=character.id).delete()
-            for skill_id in selected_skills:
-                skill = Skill.query.get(skill_id)
-                if skill:
-                    character_skill = CharacterSkill(
-                        character_id=character.id,
-                        skill_id=skill.id
-                    )
-                    db.session.add(character_skill)
-                    total_spent += skill.cost
-            character.status_spent = total_spent
-            character.status_remaining = character.total_status - total_spent
-            character.update_rank()
-            if total_spent > character.total_status:
+            price = price_submitted_build(character, request.form)
+            if price.status_remaining < 0:
                 flash('Error: Total status spent exceeds available status points')
                 return redirect(url_for('users.edit_character', character_id=character.id))
+            apply_build(character, price)
             db.session.commit()
+            refresh_character_sheets([character.id])
             flash('Character updated successfully!')
             return redirect(url_for('users.my_characters'))
         except Exception as e:
             db.session.rollback()
             flash(f'Error updating character: {str(e)}')
             return redirect(url_for('users.edit_character', character_id=character.id))
-    skills = Skill.query.all()
-    skills_by_category = {}
-    skills_by_subcategory = {}
-    for skill in skills:
-        if skill.lore_category not in skills_by_category:
-            skills_by_category[skill.lore_category] = []
-            skills_by_subcategory[skill.lore_category] = {}
-        if skill.sub_category not in skills_by_subcategory[skill.lore_category]:
-            skills_by_subcategory[skill.lore_category][skill.sub_category] = []
-        skills_by_subcategory[skill.lore_category][skill.sub_category].append(skill)
-    character_skills = [cs.skill_id for cs in character.skills]
+    catalog = get_skill_catalog()
+    character_skills = {cs.skill_id for cs in character.skills}
     return render_template('edit_character.html',
                          character=character,
                          species_by_realm=SPECIES_BY_REALM,
-                         skills_by_category=skills_by_category,
-                         skills_by_subcategory=skills_by_subcategory,
-                         character_skills=character_skills)
+                         skills_by_category=catalog.skills_by_category,
+                         skills_by_subcategory=catalog.skills_by_subcategory,
+                         character_skills=character_skills,
+                         status_costs=dict(STATUS_COST_TABLES))
+
+def price_json_build(data, total_status=None):
+    """Price a JSON build {health, stamina, skills: [ids]}, taking total_status from the build when not given;
+    raises ValueError for a malformed or out-of-range one"""
+    if not isinstance(data, dict):
+        raise ValueError('Send the build as a JSON object')
+    if total_status is None:
+        try:
+            total_status = int(data.get('total_status', STARTING_STATUS))
+        except (TypeError, ValueError):
+            raise ValueError('total_status must be a whole number')
+    skill_ids = data.get('skills', [])
+    if not isinstance(skill_ids, list):
+        raise ValueError('skills must be a list of skill ids')
+    try:
+        health, stamina = int(data.get('health', 0)), int(data.get('stamina', 0))
+    except (TypeError, ValueError):
+        raise ValueError('health and stamina must be whole numbers')
+    return price_build(total_status, health, stamina, skill_ids, get_skill_catalog())
+
+@users_bp.route('/price_build', methods=['POST'])
+@login_required
+def price_build_json():
+    """Price a JSON build {total_status, health, stamina, skills: [ids]} without saving anything"""
+    try:
+        price = price_json_build(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    return jsonify({'success': True, **price_summary(price)})
+
+@users_bp.route('/character/<int:character_id>/validate_build', methods=['POST'])
+@login_required
+def validate_build(character_id):
+    """Check a candidate build for one of the user's characters as the builder changes; nothing is written"""
+    character = db.session.query(Character.user_id, Character.total_status).filter(Character.id == character_id).first()
+    if character is None or character.user_id != current_user.id:
+        return jsonify({'success': False, 'message': 'You do not have permission to build this character'})
+    try:
+        price = price_json_build(request.get_json(silent=True) or {}, character.total_status)
+    except ValueError as e:
+        return jsonify({'success': True, 'valid': False, 'errors': [str(e)]})
+    errors = []
+    if price.status_remaining < 0:
+        errors.append('Total status spent exceeds available status points')
+    return jsonify({'success': True, 'valid': not errors, 'errors': errors, **price_summary(price)})
 
 @users_bp.route('/view_character/<int:character_id>')
 @login_required
@@ -280,22 +297,13 @@ def view_character(character_id):
     character = Character.query.get_or_404(character_id)
     if character.user_id != current_user.id:
         return redirect(url_for('users.my_characters'))
-    skills = Skill.query.all()
-    skills_by_category = {}
-    skills_by_subcategory = {}
-    for skill in skills:
-        if skill.lore_category not in skills_by_category:
-            skills_by_category[skill.lore_category] = []
-            skills_by_subcategory[skill.lore_category] = {}
-        if skill.sub_category not in skills_by_subcategory[skill.lore_category]:
-            skills_by_subcategory[skill.lore_category][skill.sub_category] = []
-        skills_by_subcategory[skill.lore_category][skill.sub_category].append(skill)
-    character_skills = [cs.skill_id for cs in character.skills]
-    resources = sum(cs.skill.resources or 0 for cs in character.skills)
+    catalog = get_skill_catalog()
+    character_skills = {cs.skill_id for cs in character.skills}
+    _, _, resources = price_skills(character_skills, catalog)
     return render_template('view_character.html',
                          character=character,
-                         skills_by_category=skills_by_category,
-                         skills_by_subcategory=skills_by_subcategory,
+                         skills_by_category=catalog.skills_by_category,
+                         skills_by_subcategory=catalog.skills_by_subcategory,
                          character_skills=character_skills,
                          resources=resources)
 
@@ -318,9 +326,13 @@ def character_status_history(character_id):
     status_history = adjustment_history + participations
     status_history.sort(key=lambda x: x['date'])
     status_totals = {k: 0 for k in ['Writing', 'Management', 'Service', 'Cast', 'Interaction', 'Play']}
-    for adj in adjustments:
-        if adj.status_type in status_totals:
-            status_totals[adj.status_type] += adj.amount
+    totals_by_type = db.session.query(
+        StatusTotal.status_type,
+        func.sum(StatusTotal.amount)
+    ).filter_by(character_id=character_id).group_by(StatusTotal.status_type)
+    for status_type, amount in totals_by_type:
+        if status_type in status_totals:
+            status_totals[status_type] = amount or 0
     return render_template('character_status_history.html',
                          character=character,
                          status_history=status_history,
@@ -369,7 +381,9 @@ def adjust_character_status():
     character.status_remaining += status_amount
     character.update_rank()
     db.session.add(adjustment)
+    record_status_totals([(character.id, status_type, None, status_amount)])
     db.session.commit()
+    refresh_character_sheets([character.id])
     flash(f'Successfully adjusted status for {character.name}')
     return redirect(url_for('events.status_management'))
 
@@ -398,13 +412,10 @@ def delete_character(character_id):
         flash('You do not have permission to delete this character')
         return redirect(url_for('users.my_characters'))
     try:
-        CharacterSkill.query.filter_by(character_id=character.id).delete()
-        StatusAdjustment.query.filter_by(character_id=character.id).delete()
-        StatusPurchase.query.filter_by(character_id=character.id).delete()
-        EventParticipation.query.filter_by(character_id=character.id).delete()
-        CastSignup.query.filter_by(character_id=character.id).delete()
+        # Skills, status history, bookings and signups go with it through ON DELETE CASCADE
         db.session.delete(character)
         db.session.commit()
+        drop_character_sheets([character_id])
         flash(f'Character {character.name} has been deleted')
     except Exception as e:
         db.session.rollback()
@@ -434,6 +445,48 @@ def admin_permissions():
     users = query.all()
     return render_template('admin_permissions.html', users=users, is_admin=current_user.is_admin)
 
+# Memberships that ran out longer ago than this are offered for cleanup by default
+LAPSED_GRACE_DAYS = 90
+
+@users_bp.route('/admin/lapsed', methods=['GET', 'POST'])
+@login_required
+def admin_lapsed_accounts():
+    # Check if user has admin permissions
+    if not current_user.is_admin:
+        flash('You do not have permission to access this page')
+        return redirect(url_for('users.my_characters'))
+
+    grace_days = request.values.get('grace_days', LAPSED_GRACE_DAYS, type=int)
+    cutoff = datetime.now(UTC).replace(tzinfo=None) - timedelta(days=max(grace_days, 0))
+
+    if request.method == 'POST':
+        user_ids = [int(user_id) for user_id in request.form.getlist('user_ids') if user_id.isdigit()]
+        if not user_ids:
+            flash('No accounts selected')
+            return redirect(url_for('users.admin_lapsed_accounts', grace_days=grace_days))
+        # Re-check the selection, so a stale or edited form can't reach accounts that renewed
+        lapsed_ids = select(User.id).where(User.id.in_(user_ids), User.membership_expiry < cutoff)
+        try:
+            character_ids = db.session.scalars(select(Character.id).where(Character.user_id.in_(lapsed_ids))).all()
+            # One statement for every selected account; their characters' rows follow through ON DELETE CASCADE
+            deleted = Character.query.filter(Character.user_id.in_(lapsed_ids)).delete(synchronize_session=False)
+            db.session.commit()
+            drop_character_sheets(character_ids)
+            flash(f'Deleted {deleted} characters from lapsed accounts')
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error deleting lapsed characters: {str(e)}")
+            flash('Error deleting characters. Please try again.')
+        return redirect(url_for('users.admin_lapsed_accounts', grace_days=grace_days))
+
+    accounts = db.session.query(
+        User.id, User.first_name, User.last_name, User.email, User.membership_level, User.membership_expiry,
+        func.count(Character.id).label('character_count')
+    ).join(Character, Character.user_id == User.id).filter(
+        User.membership_expiry < cutoff
+    ).group_by(User.id).order_by(User.membership_expiry).all()
+    return render_template('admin_lapsed_accounts.html', accounts=accounts, grace_days=grace_days, cutoff=cutoff)
+
 @users_bp.route('/admin/membership/<int:user_id>', methods=['GET', 'POST'])
 @login_required
 def admin_manage_membership(user_id):
@@ -464,8 +517,9 @@ def admin_manage_membership(user_id):
             user.membership_expiry = None
         
         db.session.commit()
+        forget_principal(user.id)
         flash(f'Membership updated for {user.first_name} {user.last_name}')
         return redirect(url_for('users.admin_permissions'))
     
-    return render_template('admin_manage_membership.html', user=user)
+    return render_template('admin_manage_membership.html', user=user, editable_ids=user.editable_character_ids())
 